@@ -1,29 +1,77 @@
 from datetime import datetime
 from dataclasses import dataclass, field
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple, Union
 from functools import cached_property
 from .classes import WiFiDevice
+from .probes import probe_fingerprint
 import json
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
 class KismetDevice(WiFiDevice):
-    """Kismet-detected WiFi device with additional metadata."""
+    """Kismet-detected WiFi device with additional metadata.
+
+    If `raw_json` is given instead of `metadata`, the device blob is only
+    decoded the first time `metadata`, `dot11` or `name` is read.
+    """
 
     first_time: Optional[datetime] = None
     last_time: Optional[datetime] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
     dot11: Dict[str, Any] = field(default_factory=dict)
+    raw_json: Optional[Union[str, bytes]] = field(default=None, repr=False, compare=False)
 
     def __post_init__(self):
         if self.device_type:
             self.device_type = self.device_type.strip().strip("'")
 
-        self.dot11 = self.metadata.get("dot11.device", {})
+        if self.raw_json is not None and not self.metadata:
+            # Drop the placeholders so __getattr__ decodes on first access
+            del self.metadata
+            del self.dot11
+            return
+
+        self.dot11 = self.metadata.get("dot11.device") or {}
 
         if not self.name:
             self.name = self.metadata.get("kismet.device.base.commonname", self.mac)
 
+    def __getattr__(self, attr):
+        if attr in ("metadata", "dot11") and "raw_json" in self.__dict__:
+            self._decode()
+            return self.__dict__[attr]
+        raise AttributeError(f"{type(self).__name__!r} object has no attribute {attr!r}")
+
+    def _decode(self) -> None:
+        """Parse the stored device blob into metadata/dot11 and fill in the name."""
+        try:
+            metadata: dict = json.loads(self.raw_json)
+        except json.decoder.JSONDecodeError as e:
+            metadata = {}
+            logger.warning("Error decoding %s: %s", self.mac, e)
+        except UnicodeDecodeError as e:
+            metadata = {}
+            logger.warning("Unicode error on %s: %s", self.mac, e)
+        self.raw_json = None
+        self.metadata = metadata
+        self.dot11 = metadata.get("dot11.device") or {}
+        if not self._name:
+            self._name = metadata.get("kismet.device.base.commonname", self.mac)
+
+    @property
+    def name(self) -> Optional[str]:
+        if not self._name and "metadata" not in self.__dict__:
+            self._decode()
+        return self._name
+
+    @name.setter
+    def name(self, value: Optional[str]):
+        self._name = value
+
     @property
     def mac(self) -> str:
         return self.identifier
@@ -32,13 +80,28 @@ class KismetDevice(WiFiDevice):
     def json(self) -> dict:
         return self.metadata
     
-    @property
+    @cached_property
     def channel(self) -> str:
-        return self.dot11.get('dot11.device.last_beaconed_ssid_record', {}).get('dot11.advertisedssid.channel', '')
+        return (self.dot11.get('dot11.device.last_beaconed_ssid_record') or {}).get('dot11.advertisedssid.channel', '')
     
-    @property
+    @cached_property
     def crypt(self) -> str:
-        return self.dot11.get('dot11.device.last_beaconed_ssid_record', {}).get('dot11.advertisedssid.crypt_string', '')
+        return (self.dot11.get('dot11.device.last_beaconed_ssid_record') or {}).get('dot11.advertisedssid.crypt_string', '')
+
+    @cached_property
+    def min_signal(self) -> Optional[int]:
+        """Weakest signal Kismet recorded for the device, in dBm."""
+        return (self.metadata.get("kismet.device.base.signal") or {}).get("kismet.common.signal.min_signal")
+
+    @cached_property
+    def max_signal(self) -> Optional[int]:
+        """Strongest signal Kismet recorded for the device, in dBm."""
+        return (self.metadata.get("kismet.device.base.signal") or {}).get("kismet.common.signal.max_signal")
+
+    @cached_property
+    def last_signal(self) -> Optional[int]:
+        """Most recent signal Kismet recorded for the device, in dBm."""
+        return (self.metadata.get("kismet.device.base.signal") or {}).get("kismet.common.signal.last_signal")
 
     @cached_property
     def probedSSIDs(self) -> list[str]:
@@ -52,7 +115,7 @@ class KismetDevice(WiFiDevice):
             list[str]: All of the non-blank SSIDs in the device's probed_ssid_map
         """
 
-        probe_map = self.dot11.get("dot11.device.probed_ssid_map", {})
+        probe_map = self.dot11.get("dot11.device.probed_ssid_map") or []
         SSIDs = [
             i["dot11.probedssid.ssid"]
             for i in probe_map
@@ -65,6 +128,11 @@ class KismetDevice(WiFiDevice):
         """A hash of the probed SSIDs to speed up comparison"""
         return hash(tuple(self.probedSSIDs))
 
+    @cached_property
+    def probe_fingerprint(self) -> str:
+        """Order-insensitive probe hash that is stable across processes and runs."""
+        return probe_fingerprint(self.probedSSIDs)
+
     @cached_property
     def clients(self) -> list[str]:
         """
@@ -75,17 +143,32 @@ class KismetDevice(WiFiDevice):
         Returns:
             list: A list of client MAC addresses
         """
-        return [i for i in self.dot11.get("dot11.device.associated_client_map", {})]
+        return [i for i in self.dot11.get("dot11.device.associated_client_map") or {}]
 
     @cached_property
     def hashes(self) -> list[str]:
         hashes = [
             str(handshake.get("dot11.eapol.rsn_pmkid"))
-            for handshake in self.dot11.get("dot11.device.wpa_handshake_list", [])
+            for handshake in self.dot11.get("dot11.device.wpa_handshake_list") or []
             if handshake.get("dot11.eapol.rsn_pmkid")
         ]
         return hashes
 
+    def summary(self) -> Dict[str, Any]:
+        """The derived fields, as accepted by from_summary()."""
+        return {attr: getattr(self, attr) for attr in SUMMARY_FIELDS}
+
+    @classmethod
+    def from_summary(cls, mac_address: str, summary: Dict[str, Any], **kwargs):
+        """
+        Rebuild a device from previously extracted fields without any device JSON.
+
+        The summary values pre-fill the cached properties, so metadata and dot11 stay empty.
+        """
+        device = create_kismet_device(mac_address, **kwargs)
+        device.__dict__.update({k: v for k, v in summary.items() if k in SUMMARY_FIELDS})
+        return device
+
     @classmethod
     def create_kismet_device(cls, mac_address: str, **kwargs):
         return KismetDevice(identifier=mac_address, **kwargs)
@@ -112,6 +195,19 @@ class KismetDevice(WiFiDevice):
         )
 
 
+# Cached properties carried by KismetDevice.summary()
+SUMMARY_FIELDS = (
+    "channel",
+    "crypt",
+    "min_signal",
+    "max_signal",
+    "last_signal",
+    "probedSSIDs",
+    "clients",
+    "hashes",
+)
+
+
 def create_kismet_device(mac_address: str, **kwargs) -> KismetDevice:
     """Create a Kismet device using a MAC address as the identifier."""
     return KismetDevice(identifier=mac_address, **kwargs)
@@ -133,6 +229,87 @@ def clean_dict_keys(obj: dict|list) -> dict:
     else:
         return obj
 
+@dataclass(slots=True)
+class DeviceRecord:
+    """
+    Compact, slotted copy of the fields aya extracts from a KismetDevice.
+
+    Holds no metadata/dot11 dicts, so millions of these fit where KismetDevices
+    wouldn't. It exposes the same mac/identifier/name/device_type/probedSSIDs/
+    clients/hashes attributes the analysis functions read from a KismetDevice.
+    """
+
+    mac: str
+    device_type: Optional[str] = None
+    name: Optional[str] = None
+    first_time: Optional[datetime] = None
+    last_time: Optional[datetime] = None
+    channel: str = ""
+    crypt: str = ""
+    min_signal: Optional[int] = None
+    max_signal: Optional[int] = None
+    last_signal: Optional[int] = None
+    probed_ssids: Tuple[str, ...] = ()
+    clients: Tuple[str, ...] = ()
+    hashes: Tuple[str, ...] = ()
+
+    @property
+    def identifier(self) -> str:
+        return self.mac
+
+    @property
+    def probedSSIDs(self) -> list[str]:
+        return list(self.probed_ssids)
+
+    @property
+    def probehash(self):
+        return hash(self.probed_ssids)
+
+    @property
+    def probe_fingerprint(self) -> str:
+        return probe_fingerprint(self.probed_ssids)
+
+    @classmethod
+    def from_kismet_device(cls, device: KismetDevice) -> "DeviceRecord":
+        summary = device.summary()
+        return cls(
+            device.mac,
+            # Device types repeat across every row, so share one string object
+            sys.intern(device.device_type) if device.device_type else None,
+            device.name,
+            device.first_time,
+            device.last_time,
+            summary["channel"],
+            summary["crypt"],
+            summary["min_signal"],
+            summary["max_signal"],
+            summary["last_signal"],
+            tuple(summary["probedSSIDs"]),
+            tuple(summary["clients"]),
+            tuple(summary["hashes"]),
+        )
+
+    def to_kismet_device(self) -> KismetDevice:
+        summary = {
+            "channel": self.channel,
+            "crypt": self.crypt,
+            "min_signal": self.min_signal,
+            "max_signal": self.max_signal,
+            "last_signal": self.last_signal,
+            "probedSSIDs": list(self.probed_ssids),
+            "clients": list(self.clients),
+            "hashes": list(self.hashes),
+        }
+        return KismetDevice.from_summary(
+            self.mac,
+            summary,
+            first_time=self.first_time,
+            last_time=self.last_time,
+            device_type=self.device_type,
+            name=self.name,
+        )
+
+
 if __name__ == "__main__":
     x = create_kismet_device(
         mac_address="aabbccddeeff", name="MyDevice", device_type="Client"
@@ -1,10 +1,24 @@
+import hashlib
+import logging
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import closing
 from datetime import datetime
 from dataclasses import dataclass, field
 from pathlib import Path
-from functools import cached_property
-from typing import Optional, List, Dict, Tuple, Any
-from .KismetDevice import KismetDevice
-from .lib import get_devs
+from functools import cached_property, partial
+from typing import Optional, List, Dict, Tuple, Any, Callable, Iterator, NamedTuple, Sequence, TypeVar
+from .cache import DEFAULT_CACHE_DIR, DeviceCache, file_signature
+from .classes import Device, SearchHit
+from .KismetDevice import DeviceRecord, KismetDevice
+from .lib import get_devs, iter_devs, match_soi, normalize_mac
+from .wigle import match_macs
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+DEFAULT_MANIFEST_PATH = DEFAULT_CACHE_DIR / "manifest.sqlite"
 
 
 @dataclass
@@ -13,6 +27,8 @@ class Survey:
     name: str
     location: Tuple[float, float] = field(default_factory=tuple)
     devices: List[KismetDevice] = field(default_factory=list)
+    # Arrow view of the survey's rows when it was loaded from a snapshot, see aya.columnar
+    table: Any = field(default=None, repr=False)
 
     def __post_init__(self):
         if not self.name:
@@ -22,6 +38,55 @@ class Survey:
     def get_devices(self) -> List[KismetDevice]:
         return get_devs(self.path)
 
+    def merge(self, devices: Sequence[KismetDevice]) -> None:
+        """Fold newer copies of devices into the survey, replacing any loaded device with the same MAC."""
+        if self.table is not None:
+            # The snapshot view goes stale once devices change, so carry on from its records
+            if not self.devices:
+                from .columnar import table_records
+
+                self.devices = table_records(self.table).get(str(self.path), [])
+            self.table = None
+        by_mac = {device.mac: device for device in self.devices}
+        by_mac.update((device.mac, device) for device in devices)
+        self.devices = list(by_mac.values())
+        self.__dict__.pop("access_points", None)
+
+    def export_snapshot(self, dest: Path) -> None:
+        """Write the survey's devices to an Arrow IPC or Parquet snapshot (see aya.columnar).
+
+        Uses the loaded devices, then the snapshot table it was loaded from, and parses the kismetdb if neither is there.
+        """
+        from .columnar import surveys_table, write_snapshot
+
+        write_snapshot(surveys_table([(str(self.path), self._snapshot_source())]), dest)
+
+    def _snapshot_source(self):
+        if self.devices:
+            return self.devices
+        if self.table is not None:
+            return self.table
+        return get_devs(self.path, compact=True)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Path, records: bool = False) -> "Survey":
+        """
+        Load a single-survey snapshot into a Survey whose table is a zero-copy Arrow view of it.
+
+        Args:
+            snapshot (Path): Arrow IPC or Parquet file written by export_snapshot
+            records (bool): Also materialize the rows as DeviceRecords in devices. This copies every row, see aya.columnar.table_records.
+        """
+        from .columnar import read_snapshot, survey_tables, table_records
+
+        surveys = survey_tables(read_snapshot(snapshot))
+        if len(surveys) != 1:
+            msg = f"{snapshot} holds {len(surveys)} surveys, use Project.from_snapshot"
+            raise ValueError(msg)
+        path, table = surveys.popitem()
+        devices = table_records(table)[path] if records else []
+        return cls(Path(path), "", devices=devices, table=table)
+
     @cached_property
     def access_points(self) -> List[KismetDevice]:
         return [
@@ -42,3 +107,366 @@ class Project:
         for survey in self.surveys:
             devices.extend(survey.devices)
         return devices
+
+    def ingest(
+        self,
+        project_path: Path,
+        manifest: Optional["ProjectManifest"] = None,
+        devtype: Optional[List[str]] = None,
+        workers: Optional[int] = None,
+        compact: bool = False,
+        pattern: str = "**/*.kismet",
+    ) -> Dict[Path, str]:
+        """
+        Bring the project's surveys up to date with the kismetdb files on disk, reading only what changed.
+
+        Surveys the manifest knows are unchanged are skipped. A file that grew since the last ingest,
+        e.g. one Kismet is still writing during a live survey, only has its rows updated since the
+        recorded watermark read and merged into the loaded survey. New files, and files that were
+        replaced rather than appended to, are read in full. Surveys whose file is gone are dropped.
+
+        Persist the result between runs with export_snapshot and from_snapshot(records=True); the
+        manifest is only trusted for surveys already present in the project.
+
+        Args:
+            project_path (Path): Project folder to search for survey files
+            manifest (Optional[ProjectManifest]): Ingest state, defaults to the shared manifest in the aya cache
+            devtype (Optional[List[str]]): kismetdb device types to pull, see get_devs
+            workers (Optional[int]): Pool size, see map_surveys
+            compact (bool): Store DeviceRecords instead of KismetDevices, see get_devs
+            pattern (str): Glob used to find survey files
+
+        Returns:
+            Dict[Path, str]: Every survey that changed, mapped to "new", "appended", "replaced" or "removed"
+        """
+        own_manifest = manifest is None
+        manifest = manifest or ProjectManifest()
+        try:
+            return self._ingest(project_path, manifest, devtype, workers, compact, pattern)
+        finally:
+            if own_manifest:
+                manifest.close()
+
+    def _ingest(
+        self,
+        project_path: Path,
+        manifest: "ProjectManifest",
+        devtype: Optional[List[str]],
+        workers: Optional[int],
+        compact: bool,
+        pattern: str,
+    ) -> Dict[Path, str]:
+        surveys = {survey.path.resolve(): survey for survey in self.surveys}
+        files = sorted(path.resolve() for path in project_path.glob(pattern))
+        changes: Dict[Path, str] = {}
+        for gone in surveys.keys() - set(files):
+            self.surveys.remove(surveys.pop(gone))
+            manifest.forget(gone)
+            changes[gone] = "removed"
+
+        previous = {}
+        for path in files:
+            entry = manifest.get(path) if path in surveys else None
+            if entry and _survey_signature(path)[1:] == (entry.size, entry.mtime_ns):
+                continue
+            previous[path] = entry
+        reader = partial(_read_survey_delta, previous=previous, devtype=devtype, compact=compact)
+        for path, (entry, devices, status) in map_files(list(previous), reader, workers):
+            if status == "new" and path not in surveys:
+                survey = Survey(path, "", devices=devices)
+                self.surveys.append(survey)
+                surveys[path] = survey
+            elif status in ("appended", "unchanged"):
+                # An unchanged delta can still carry devices updated within the watermark's second
+                surveys[path].merge(devices)
+            elif status in ("new", "replaced"):
+                surveys[path].devices = devices
+                surveys[path].table = None
+                surveys[path].__dict__.pop("access_points", None)
+            manifest.update(entry)
+            if status != "unchanged":
+                changes[path] = status
+        self.surveys.sort(key=lambda survey: survey.path)
+        return changes
+
+    def export_snapshot(self, dest: Path) -> None:
+        """Write every survey's devices into one Arrow IPC or Parquet snapshot (see aya.columnar)."""
+        from .columnar import surveys_table, write_snapshot
+
+        surveys = [(str(survey.path), survey._snapshot_source()) for survey in self.surveys]
+        write_snapshot(surveys_table(surveys), dest)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: Path, name: Optional[str] = None, records: bool = False) -> "Project":
+        """
+        Load a snapshot into a Project with one Survey per survey in it, each holding a zero-copy Arrow view.
+
+        Args:
+            snapshot (Path): Arrow IPC or Parquet file written by export_snapshot
+            name (Optional[str]): Project name, defaults to the snapshot's file name
+            records (bool): Also materialize every survey's rows as DeviceRecords. This copies every row, see aya.columnar.table_records.
+        """
+        from .columnar import read_snapshot, survey_tables, table_records
+
+        surveys = survey_tables(read_snapshot(snapshot))
+        return cls(
+            name or Path(snapshot).stem,
+            [
+                Survey(Path(path), "", devices=table_records(table)[path] if records else [], table=table)
+                for path, table in sorted(surveys.items())
+            ],
+        )
+
+
+class ManifestEntry(NamedTuple):
+    """What a survey file looked like when it was last ingested."""
+
+    path: str
+    size: int
+    mtime_ns: int
+    digest: Optional[str]
+    first_time: Optional[float]
+    watermark: Optional[float]
+
+
+class ProjectManifest:
+    """SQLite-backed record of every survey file an ingest has processed.
+
+    Each entry holds the file's size, mtime and content hash, the earliest device first_time
+    (which identifies the capture, so a replaced file isn't mistaken for a grown one) and the
+    latest device last_time, the watermark the next delta read starts from. The hash is only
+    taken when a file is read in full, so it is None once a delta has been merged.
+
+    Args:
+        path (Path): Manifest database file, created if missing
+
+    """
+
+    def __init__(self, path: Path = DEFAULT_MANIFEST_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.con = sqlite3.connect(self.path)
+        self.con.execute(
+            "create table if not exists surveys ("
+            "path text primary key, size int, mtime_ns int, digest text, first_time real, watermark real)"
+        )
+
+    def close(self) -> None:
+        self.con.close()
+
+    def __enter__(self) -> "ProjectManifest":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def get(self, path: Path) -> Optional[ManifestEntry]:
+        row = self.con.execute("select * from surveys where path = ?", (str(Path(path).resolve()),)).fetchone()
+        return ManifestEntry(*row) if row else None
+
+    def update(self, entry: ManifestEntry) -> None:
+        with self.con:
+            self.con.execute("insert or replace into surveys values (?, ?, ?, ?, ?, ?)", entry)
+
+    def forget(self, path: Path) -> None:
+        with self.con:
+            self.con.execute("delete from surveys where path = ?", (str(Path(path).resolve()),))
+
+
+def content_hash(path: Path) -> str:
+    """blake2b digest of a file's contents."""
+    with open(path, "rb") as file:
+        return hashlib.file_digest(file, "blake2b").hexdigest()
+
+
+def _survey_signature(path: Path) -> Tuple[str, int, int]:
+    """file_signature, with the mtime bumped by the -wal sidecar Kismet appends to during a live survey."""
+    resolved, size, mtime_ns = file_signature(path)
+    wal = Path(f"{resolved}-wal")
+    if wal.exists():
+        mtime_ns = max(mtime_ns, wal.stat().st_mtime_ns)
+    return resolved, size, mtime_ns
+
+
+def _survey_bounds(path: Path) -> Tuple[Optional[float], Optional[float]]:
+    """Earliest device first_time and latest device last_time in a kismetdb."""
+    with closing(sqlite3.connect(path)) as con:
+        return con.execute("select min(first_time), max(last_time) from devices").fetchone()
+
+
+def _read_survey_delta(
+    path: Path,
+    previous: Dict[Path, Optional[ManifestEntry]],
+    devtype: Optional[List[str]] = None,
+    compact: bool = False,
+) -> Tuple[ManifestEntry, list, str]:
+    """
+    Read whatever changed in a survey since its previous manifest entry; runs in a map_files worker.
+
+    Returns:
+        Tuple[ManifestEntry, list, str]: The new manifest entry, the devices read and how the file changed
+    """
+    entry = previous.get(path)
+    resolved, size, mtime_ns = _survey_signature(path)
+    # Take the bounds before reading devices so rows written meanwhile are read again next time, not lost
+    first_time, watermark = _survey_bounds(path)
+    if entry and size >= entry.size and first_time == entry.first_time and entry.watermark is not None:
+        # Same capture, still growing: only read the delta, and don't re-hash a file that may be gigabytes
+        current = ManifestEntry(resolved, size, mtime_ns, None, first_time, watermark)
+        status = "appended" if watermark is not None and watermark > entry.watermark else "unchanged"
+        since = entry.watermark
+    else:
+        digest = content_hash(path)
+        current = ManifestEntry(resolved, size, mtime_ns, digest, first_time, watermark)
+        if entry is None:
+            status, since = "new", None
+        elif digest == entry.digest:
+            return current, [], "unchanged"
+        else:
+            status, since = "replaced", None
+    devices = iter_devs(path, devtype, lazy=compact, since=since)
+    if compact:
+        return current, [DeviceRecord.from_kismet_device(i) for i in devices], status
+    return current, list(devices), status
+
+
+def map_surveys(
+    project_path: Path,
+    func: Callable[[Path], T],
+    workers: Optional[int] = None,
+    pattern: str = "**/*.kismet",
+) -> Iterator[Tuple[Path, T]]:
+    """
+    Run func over every survey file in a project using a process pool.
+
+    Results are yielded as each file finishes, so they arrive in completion
+    order rather than path order. func must be picklable (a module level
+    function or a functools.partial of one).
+
+    Args:
+        project_path (Path): Project folder to search for survey files
+        func (Callable): Called with each survey path in a worker process
+        workers (Optional[int]): Pool size, defaults to the CPU count. 1 runs everything in-process.
+        pattern (str): Glob used to find survey files
+
+    Returns:
+        Iterator[Tuple[Path, T]]: (survey path, func result) pairs
+    """
+    return map_files(sorted(project_path.glob(pattern)), func, workers)
+
+
+def map_files(
+    files: Sequence[Path],
+    func: Callable[[Path], T],
+    workers: Optional[int] = None,
+) -> Iterator[Tuple[Path, T]]:
+    """
+    Run func over an explicit list of files using a process pool, see map_surveys.
+    """
+    if workers == 1 or len(files) <= 1:
+        for file in files:
+            yield file, func(file)
+        return
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = {pool.submit(func, file): file for file in files}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def iter_surveys(
+    project_path: Path,
+    devtype: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+    lazy: bool = False,
+    fields: Optional[Sequence[str]] = None,
+    cache: Optional[DeviceCache | bool] = None,
+    compact: bool = False,
+) -> Iterator[Survey]:
+    """
+    Parse every kismetdb file in a project in parallel, yielding each Survey as it completes.
+
+    devtype, lazy, fields, cache and compact are passed through to get_devs.
+    """
+    loader = partial(get_devs, devtype=devtype, lazy=lazy, fields=fields, cache=cache, compact=compact)
+    for path, devices in map_surveys(project_path, loader, workers):
+        yield Survey(path, "", devices=devices)
+
+
+def load_project(
+    project_path: Path,
+    devtype: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+    lazy: bool = False,
+    fields: Optional[Sequence[str]] = None,
+    cache: Optional[DeviceCache | bool] = None,
+    compact: bool = False,
+) -> Project:
+    """
+    Load every kismetdb file in a project folder into a Project, parsing files in parallel.
+
+    Surveys are sorted by path so the result doesn't depend on which worker finished first.
+    """
+    surveys = iter_surveys(project_path, devtype, workers, lazy, fields, cache, compact)
+    return Project(project_path.name, sorted(surveys, key=lambda survey: survey.path))
+
+
+def _search_file(path: Path, targets: Sequence[Device]) -> List[SearchHit]:
+    """Search one kismetdb or wiglecsv file for targets; runs in a map_files worker."""
+    if path.suffix == ".csv":
+        by_mac = {normalize_mac(i.identifier): i.identifier for i in targets}
+        hits: Dict[str, SearchHit] = {}
+        # Wigle logs a row per observation, so fold them into one hit per MAC
+        for device in match_macs(path, by_mac):
+            mac = normalize_mac(device.mac)
+            seen = device.first_time
+            # from_record turns a blank RSSI into 0, which would beat every real reading
+            signal = device.rssi or None
+            hit = hits.setdefault(mac, SearchHit(by_mac[mac], path, mac, "mac", seen, seen, signal))
+            hit.first_seen = min(hit.first_seen, device.first_time)
+            hit.last_seen = max(hit.last_seen, device.first_time)
+            if signal is not None:
+                hit.signal = signal if hit.signal is None else max(hit.signal, signal)
+        return list(hits.values())
+    return [
+        SearchHit(
+            hit.target.identifier if hit.matched_on != "ssid" else hit.target.name,
+            path,
+            hit.device.mac,
+            hit.matched_on,
+            hit.device.first_time,
+            hit.device.last_time,
+            hit.device.max_signal,
+        )
+        for hit in match_soi(path, targets)
+    ]
+
+
+def search_project(
+    project: Path | Project,
+    targets: Sequence[Device],
+    workers: Optional[int] = None,
+) -> List[SearchHit]:
+    """
+    Search every kismetdb and wiglecsv file in a project for devices of interest.
+
+    Files are searched concurrently; the targets are only loaded once by the caller.
+
+    Args:
+        project (Path | Project): A project folder, or a loaded Project whose survey paths are searched
+        targets (Sequence[Device]): Devices to look for, e.g. from aya.lib.load_soi
+        workers (Optional[int]): Pool size, see map_surveys
+
+    Returns:
+        List[SearchHit]: One row per (target, file, device), sorted by file then MAC
+    """
+    if isinstance(project, Project):
+        files = [survey.path for survey in project.surveys]
+    else:
+        files = sorted([*project.glob("**/*.kismet"), *project.glob("**/*.csv")])
+    hits = []
+    for _, file_hits in map_files(files, partial(_search_file, targets=list(targets)), workers):
+        hits.extend(file_hits)
+    return sorted(hits, key=lambda hit: (str(hit.file), hit.mac))
@@ -1,28 +1,50 @@
 
 from .lib import (
     get_devs,
+    iter_devs,
+    iter_device_rows,
+    follow,
     get_access_points,
     check_filepaths,
     get_basepath,
     get_stas,
     find_soi,
+    load_soi,
+    match_soi,
+    normalize_mac,
     find_oui_matches
 )
-from .classes import WigleDevice
-from .KismetDevice import KismetDevice
+from .classes import PseudoDevice, WigleDevice
+from .KismetDevice import DeviceRecord, KismetDevice
 from .rest import Connection
+from .Project import Project, Survey, iter_surveys, load_project, map_files, map_surveys, search_project
 from . import oui
 
 __all__ = (
     "get_devs",
+    "iter_devs",
+    "iter_device_rows",
+    "follow",
     "get_access_points",
     "check_filepaths",
     "get_basepath",
     "get_stas",
     "KismetDevice",
+    "DeviceRecord",
     "WigleDevice",
+    "PseudoDevice",
     "Connection",
+    "Project",
+    "Survey",
+    "iter_surveys",
+    "load_project",
+    "map_files",
+    "map_surveys",
     "find_soi",
+    "load_soi",
+    "search_project",
+    "match_soi",
+    "normalize_mac",
     "find_oui_matches",
     "oui",
 )
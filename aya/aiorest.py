@@ -0,0 +1,198 @@
+"""Asyncio Kismet REST client.
+
+Needs the optional "async" extra (aiohttp). One keep-alive session is shared
+by every request, device queries ask Kismet for only the fields aya reads, and
+deltas() polls devices/last-time from a cursor so each poll only transfers the
+devices that changed since the previous one.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from datetime import UTC, datetime
+from typing import Any, AsyncIterator, Iterable, Optional, Sequence
+
+import aiohttp
+
+from .KismetDevice import KismetDevice, create_kismet_device
+
+logger = logging.getLogger(__name__)
+
+# Fields requested by default. Paths into nested records come back flattened and are re-nested by _nest().
+DEFAULT_FIELDS = (
+    "kismet.device.base.key",
+    "kismet.device.base.macaddr",
+    "kismet.device.base.type",
+    "kismet.device.base.commonname",
+    "kismet.device.base.first_time",
+    "kismet.device.base.last_time",
+    "kismet.device.base.signal/kismet.common.signal.last_signal",
+    "kismet.device.base.signal/kismet.common.signal.min_signal",
+    "kismet.device.base.signal/kismet.common.signal.max_signal",
+    "dot11.device/dot11.device.probed_ssid_map",
+    "dot11.device/dot11.device.last_beaconed_ssid_record",
+    "dot11.device/dot11.device.associated_client_map",
+)
+
+DEFAULT_INTERVAL = 2.0
+
+
+def _nest(record: dict, fields: Sequence[str]) -> dict:
+    """Put simplified path fields back under their parent, so KismetDevice finds them where it expects."""
+    for field in fields:
+        parent, _, child = field.rpartition("/")
+        if parent and child in record:
+            record.setdefault(parent.rpartition("/")[2], {})[child] = record.pop(child)
+    return record
+
+
+def _to_device(record: dict) -> KismetDevice:
+    """Build a KismetDevice from a REST device record (dotted keys, as from the .json endpoints)."""
+    first_time = record.get("kismet.device.base.first_time")
+    last_time = record.get("kismet.device.base.last_time")
+    return create_kismet_device(
+        record.get("kismet.device.base.macaddr"),
+        first_time=datetime.fromtimestamp(first_time, UTC) if first_time else None,
+        last_time=datetime.fromtimestamp(last_time, UTC) if last_time else None,
+        device_type=record.get("kismet.device.base.type"),
+        metadata=record,
+    )
+
+
+class AsyncConnection:
+    """Pooled asyncio connection to a Kismet server.
+
+    Accepts the same arguments as aya.rest.Connection, so connection_from_config() works for both.
+    Use it as an async context manager, or call close() when done.
+
+    Args:
+        limit (int): Maximum simultaneous connections in the pool
+        timeout (float): Per-request timeout in seconds
+
+    """
+
+    def __init__(
+        self,
+        username="kismet",
+        password="kismet",
+        address="localhost",
+        port=2501,
+        limit: int = 4,
+        timeout: float = 30.0,
+    ):
+        self.username = username
+        self.password = password
+        self.address = address
+        self.port = port
+        self.limit = limit
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def baseurl(self) -> str:
+        return f"http://{self.address}:{self.port}"
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                self.baseurl,
+                auth=aiohttp.BasicAuth(self.username, self.password),
+                connector=aiohttp.TCPConnector(limit=self.limit),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                raise_for_status=True,
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        await self.check_connection()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _get(self, path: str) -> Any:
+        async with self.session.get(path) as response:
+            return await response.json(content_type=None)
+
+    async def _post(self, path: str, payload: dict) -> Any:
+        # Kismet takes its command dictionary as a form-encoded "json" variable
+        async with self.session.post(path, data={"json": json.dumps(payload)}) as response:
+            return await response.json(content_type=None)
+
+    async def check_connection(self) -> dict:
+        """Fetch the server status, raising aiohttp.ClientError if Kismet can't be reached."""
+        return await self._get("/system/status.json")
+
+    async def device(self, devicekey: str, fields: Optional[Sequence[str]] = None) -> dict:
+        """One device's record by Kismet device key."""
+        path = f"/devices/by-key/{devicekey}/device.json"
+        if fields is None:
+            return await self._get(path)
+        return _nest(await self._post(path, {"fields": list(fields)}), fields)
+
+    async def devices_since(self, timestamp: float, fields: Optional[Sequence[str]] = DEFAULT_FIELDS) -> list[dict]:
+        """Records of every device changed since timestamp (negative means that many seconds ago)."""
+        path = f"/devices/last-time/{int(timestamp)}/devices.json"
+        if fields is None:
+            return await self._get(path)
+        return [_nest(i, fields) for i in await self._post(path, {"fields": list(fields)})]
+
+    async def devices_by_mac(self, macs: Iterable[str], fields: Optional[Sequence[str]] = DEFAULT_FIELDS) -> list[dict]:
+        """Records of the devices with the given MACs."""
+        payload: dict = {"devices": list(macs)}
+        if fields is not None:
+            payload["fields"] = list(fields)
+        records = await self._post("/devices/multimac/devices.json", payload)
+        return [_nest(i, fields) for i in records] if fields is not None else records
+
+    async def deltas(
+        self,
+        since: float = 0,
+        interval: float = DEFAULT_INTERVAL,
+        fields: Sequence[str] = DEFAULT_FIELDS,
+    ) -> AsyncIterator[KismetDevice]:
+        """Poll forever, yielding each device whenever Kismet reports it changed.
+
+        The cursor is the newest last_time seen so far and is re-requested inclusively, so
+        devices updated within the same second aren't lost; repeats are dropped by comparing
+        each device's last_time with what was already yielded. A failed poll is logged and
+        retried on the next tick from the same cursor.
+
+        Args:
+            since (float): Initial cursor, epoch seconds or negative for "seconds ago"
+            interval (float): Seconds between the start of successive polls
+            fields (Sequence[str]): Kismet fields to request; must include the device key and last_time
+
+        Returns:
+            AsyncIterator[KismetDevice]: Changed devices
+        """
+        cursor = since
+        seen: dict[str, int] = {}
+        while True:
+            started = time.monotonic()
+            try:
+                records = await self.devices_since(cursor, fields)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning("Poll of %s failed: %s", self.baseurl, e)
+                records = []
+            for record in records:
+                key = record.get("kismet.device.base.key")
+                last_time = record.get("kismet.device.base.last_time", 0)
+                if seen.get(key) == last_time:
+                    continue
+                seen[key] = last_time
+                cursor = max(cursor, last_time)
+                yield _to_device(record)
+            if records and cursor > 0:
+                # Forget devices that can no longer come back from an inclusive poll
+                seen = {k: v for k, v in seen.items() if v >= cursor}
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
@@ -0,0 +1,256 @@
+"""Real-time alerting on devices of interest from a live Kismet feed.
+
+SOIIndex holds the targets in hash tables keyed by MAC, OUI prefix, SSID
+and probe fingerprint, so checking a device costs a handful of dict lookups
+whatever the size of the list. AlertEngine matches each changed device the
+feed reports, suppresses repeats of the same alert for a TTL, and hands new
+alerts to any number of sinks.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import logging
+import sys
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Hashable, Iterable, Optional, Sequence
+
+from .lib import normalize_mac
+from .oui import PREFIX_BITS, mac_to_int, parse_prefix
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = 300.0
+
+
+@dataclass
+class Alert:
+    """A device that matched a target."""
+
+    mac: str
+    target: str
+    matched_on: str
+    name: Optional[str] = None
+    signal: Optional[int] = None
+    time: datetime = field(default_factory=lambda: datetime.now(UTC))
+    device: Any = field(default=None, repr=False, compare=False)
+
+
+Sink = Callable[[Alert], Optional[Awaitable[None]]]
+
+
+class SOIIndex:
+    """Hashed set of devices of interest.
+
+    Every add_* method takes an optional label that is reported as the alert target instead of the raw value.
+    """
+
+    def __init__(self):
+        self.macs: dict[str, str] = {}
+        self.prefixes: dict[int, dict[int, str]] = {}
+        self.ssids: dict[str, str] = {}
+        self.fingerprints: dict[str, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.macs) + sum(map(len, self.prefixes.values())) + len(self.ssids) + len(self.fingerprints)
+
+    def add_mac(self, mac: str, label: Optional[str] = None) -> None:
+        mac = normalize_mac(mac)
+        self.macs[mac] = label or mac
+
+    def add_oui(self, prefix: str, label: Optional[str] = None) -> None:
+        """Add a 24, 28 or 36 bit prefix such as C4:4F:33."""
+        bits, value = parse_prefix(prefix)
+        self.prefixes.setdefault(bits, {})[value] = label or prefix.upper()
+
+    def add_ssid(self, ssid: str, label: Optional[str] = None) -> None:
+        """Match APs advertising ssid and STAs probing for it."""
+        self.ssids[ssid] = label or ssid
+
+    def add_fingerprint(self, fingerprint: str, label: Optional[str] = None) -> None:
+        """Match STAs whose probe_fingerprint is fingerprint."""
+        self.fingerprints[fingerprint] = label or fingerprint
+
+    @classmethod
+    def from_file(cls, soi_file: Path) -> "SOIIndex":
+        """Create an index from a target file, see load()."""
+        index = cls()
+        index.load(soi_file)
+        return index
+
+    def load(self, soi_file: Path) -> None:
+        """Add a target list with one entry per line.
+
+        A line is a MAC, or "oui:", "ssid:" or "probe:" followed by the value. Anything after
+        the first whitespace on a MAC/oui/probe line is used as the label; blank lines and
+        lines starting with # are skipped.
+        """
+        adders = {"oui": self.add_oui, "ssid": self.add_ssid, "probe": self.add_fingerprint}
+        with open(soi_file) as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                kind, sep, value = line.partition(":")
+                if sep and kind.lower() in adders:
+                    if kind.lower() == "ssid":
+                        adders["ssid"](value)
+                    else:
+                        value, _, label = value.strip().partition(" ")
+                        adders[kind.lower()](value, label.strip() or None)
+                else:
+                    mac, _, label = line.partition(" ")
+                    self.add_mac(mac, label.strip() or None)
+
+    def match(self, device) -> list[tuple[str, str]]:
+        """All (target, matched_on) pairs for a KismetDevice-like object."""
+        found = []
+        mac = device.mac
+        target = self.macs.get(mac)
+        if target is not None:
+            found.append((target, "mac"))
+        if self.prefixes:
+            try:
+                value = mac_to_int(mac)
+            except ValueError:
+                value = None
+            if value is not None:
+                for bits in PREFIX_BITS:
+                    target = self.prefixes.get(bits, {}).get(value >> (48 - bits))
+                    if target is not None:
+                        found.append((target, "oui"))
+        if self.ssids:
+            if device.device_type == "Wi-Fi AP" and device.name in self.ssids:
+                found.append((self.ssids[device.name], "ssid"))
+            for ssid in device.probedSSIDs:
+                if ssid in self.ssids:
+                    found.append((self.ssids[ssid], "probe"))
+        if self.fingerprints:
+            target = self.fingerprints.get(device.probe_fingerprint)
+            if target is not None:
+                found.append((target, "fingerprint"))
+        return found
+
+
+class TTLCache:
+    """Remembers keys for ttl seconds."""
+
+    def __init__(self, ttl: float = DEFAULT_TTL, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._expiry: OrderedDict[Hashable, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def check(self, key: Hashable) -> bool:
+        """Whether key was seen within the TTL. Records it as seen now if it wasn't."""
+        now = self.clock()
+        # Every entry has the same TTL, so the oldest insertion expires first
+        while self._expiry:
+            oldest, expiry = next(iter(self._expiry.items()))
+            if expiry > now:
+                break
+            del self._expiry[oldest]
+        if key in self._expiry:
+            return True
+        self._expiry[key] = now + self.ttl
+        return False
+
+
+def print_sink(alert: Alert) -> None:
+    """Print alerts as tab separated lines."""
+    print("\t".join(str(i) for i in (alert.time.isoformat(), alert.mac, alert.target, alert.matched_on, alert.name, alert.signal)))
+    sys.stdout.flush()
+
+
+class JSONLinesSink:
+    """Append alerts to a JSON lines file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def __call__(self, alert: Alert) -> None:
+        record = {
+            "time": alert.time.isoformat(),
+            "mac": alert.mac,
+            "target": alert.target,
+            "matched_on": alert.matched_on,
+            "name": alert.name,
+            "signal": alert.signal,
+        }
+        with open(self.path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+
+class AlertEngine:
+    """Match devices against an SOIIndex and dispatch new alerts.
+
+    Args:
+        index (SOIIndex): Targets
+        sinks (Sequence[Sink]): Called with each new alert; may be plain functions or coroutine functions
+        ttl (float): Seconds during which the same device/target/match is not alerted again
+
+    """
+
+    def __init__(self, index: SOIIndex, sinks: Sequence[Sink] = (print_sink,), ttl: float = DEFAULT_TTL):
+        self.index = index
+        self.sinks = list(sinks)
+        self.recent = TTLCache(ttl)
+        self.stats: Counter[str] = Counter()
+
+    def process(self, device) -> list[Alert]:
+        """Match one device, returning only the alerts not raised within the TTL."""
+        self.stats["devices"] += 1
+        alerts = []
+        for target, matched_on in self.index.match(device):
+            if self.recent.check((device.mac, target, matched_on)):
+                self.stats["suppressed"] += 1
+                continue
+            self.stats["alerts"] += 1
+            alerts.append(Alert(device.mac, target, matched_on, device.name, device.last_signal, device=device))
+        return alerts
+
+    def dispatch(self, alert: Alert) -> list[Awaitable]:
+        """Call every sink, returning the awaitables from any async ones. A failing sink doesn't stop the others."""
+        pending = []
+        for sink in self.sinks:
+            try:
+                result = sink(alert)
+            except Exception as e:
+                logger.warning("Alert sink %r failed: %s", sink, e)
+                continue
+            if inspect.isawaitable(result):
+                pending.append(result)
+        return pending
+
+    def handle(self, devices: Iterable) -> list[Alert]:
+        """Process and dispatch devices synchronously, e.g. from aya.rest or a kismetdb."""
+        alerts = []
+        for device in devices:
+            for alert in self.process(device):
+                self.dispatch(alert)
+                alerts.append(alert)
+        return alerts
+
+    async def run(self, connection, since: float = -60, interval: float = 2.0) -> None:
+        """Alert on the device deltas of an aya.aiorest.AsyncConnection until cancelled."""
+        async for device in connection.deltas(since, interval):
+            try:
+                alerts = self.process(device)
+            except Exception:
+                # A device the feed reported oddly mustn't end the whole alert loop
+                logger.exception("Failed to match device %s", getattr(device, "mac", None))
+                continue
+            for alert in alerts:
+                pending = self.dispatch(alert)
+                if pending:
+                    for result in await asyncio.gather(*pending, return_exceptions=True):
+                        if isinstance(result, Exception):
+                            logger.warning("Alert sink failed: %s", result)
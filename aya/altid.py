@@ -0,0 +1,205 @@
+"""Find alternate identifiers: devices that keep turning up near a target.
+
+Sightings are bucketed into a space-time grid, cells of cell_degrees
+latitude/longitude by window seconds. Two devices co-occur when they share a
+bucket, and only pairs inside the same bucket are ever compared, so the cost
+grows with the sightings rather than with the square of the devices. Buckets
+with more than max_bucket devices (stadiums, train stations, the office) say
+little about any one pair and are skipped.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections import Counter, defaultdict
+from contextlib import closing
+from dataclasses import dataclass
+from functools import partial
+from itertools import combinations
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .classes import Device
+
+DEFAULT_CELL_DEGREES = 0.0005  # roughly 55m of latitude
+DEFAULT_WINDOW = 300
+DEFAULT_MAX_BUCKET = 200
+
+NULL_MAC = "00:00:00:00:00:00"
+
+BucketKey = tuple[int, int, int]
+
+
+@dataclass
+class AltIDCandidate:
+    """A device seen alongside another, and how often."""
+
+    mac: str
+    other: str
+    co_occurrences: int
+    places: int
+    score: float
+
+
+def survey_buckets(
+    kismet_file: Path,
+    cell_degrees: float = DEFAULT_CELL_DEGREES,
+    window: int = DEFAULT_WINDOW,
+) -> set[tuple[str, int, int, int]]:
+    """Every (mac, lat cell, lon cell, time window) with a located packet or data record in a kismet file.
+
+    The quantizing and de-duplication happen in SQLite, so only one row per device per bucket reaches Python.
+    """
+    if not Path.exists(kismet_file):
+        msg = f"File not found: {kismet_file}"
+        raise FileNotFoundError(msg)
+    grid = "cast(ts_sec / :window as int), cast((lat + 90) / :cell as int), cast((lon + 180) / :cell as int)"
+    query = f"""
+        select sourcemac, {grid} from packets where (lat != 0 or lon != 0) and sourcemac != :null
+        union
+        select devmac, {grid} from data where (lat != 0 or lon != 0) and devmac != :null
+    """
+    params = {"window": int(window), "cell": cell_degrees, "null": NULL_MAC}
+    with closing(sqlite3.connect(kismet_file)) as con:
+        return {(mac, lat, lon, ts) for mac, ts, lat, lon in con.execute(query, params)}
+
+
+class CoLocationIndex:
+    """Space-time grid of device sightings.
+
+    Args:
+        cell_degrees (float): Grid cell size in degrees of latitude and longitude
+        window (int): Time bucket size in seconds
+        max_bucket (int): Skip buckets holding more devices than this when scoring
+
+    """
+
+    def __init__(
+        self,
+        cell_degrees: float = DEFAULT_CELL_DEGREES,
+        window: int = DEFAULT_WINDOW,
+        max_bucket: int = DEFAULT_MAX_BUCKET,
+    ):
+        self.cell_degrees = cell_degrees
+        self.window = int(window)
+        self.max_bucket = max_bucket
+        self.macs: list[str] = []
+        self._ids: dict[str, int] = {}
+        self._buckets: dict[BucketKey, set[int]] = defaultdict(set)
+        self._device_buckets: dict[int, set[BucketKey]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self.macs)
+
+    def _id(self, mac: str) -> int:
+        device = self._ids.get(mac)
+        if device is None:
+            device = self._ids[mac] = len(self.macs)
+            self.macs.append(mac)
+        return device
+
+    def _add_bucket(self, mac: str, key: BucketKey) -> None:
+        device = self._id(mac)
+        self._buckets[key].add(device)
+        self._device_buckets[device].add(key)
+
+    def add(self, mac: str, ts: float, lat: float, lon: float) -> None:
+        """Add one sighting, ts in epoch seconds."""
+        if not lat and not lon:
+            return
+        key = (int((lat + 90) // self.cell_degrees), int((lon + 180) // self.cell_degrees), int(ts // self.window))
+        self._add_bucket(mac, key)
+
+    def add_device(self, device: Device) -> None:
+        """Add every geolocation of a device (e.g. Wigle sightings)."""
+        for location in device.geolocations:
+            self.add(device.identifier, location.time.timestamp(), location.latitude, location.longitude)
+
+    def ingest_survey(self, kismet_file: Path) -> None:
+        """Add the located packets and data records of a kismet file."""
+        self._merge(survey_buckets(kismet_file, self.cell_degrees, self.window))
+
+    def ingest_project(self, project_path: Path, workers: Optional[int] = None) -> None:
+        """Add every kismet file in a project, reading them in a process pool."""
+        from .Project import map_surveys
+
+        read = partial(survey_buckets, cell_degrees=self.cell_degrees, window=self.window)
+        for _, buckets in map_surveys(project_path, read, workers):
+            self._merge(buckets)
+
+    def _merge(self, buckets: Iterable[tuple[str, int, int, int]]) -> None:
+        for mac, lat, lon, ts in buckets:
+            self._add_bucket(mac, (lat, lon, ts))
+
+    def _candidate(self, device: int, other: int, co: int, places: int) -> AltIDCandidate:
+        smaller = min(len(self._device_buckets[device]), len(self._device_buckets[other]))
+        return AltIDCandidate(self.macs[device], self.macs[other], co, places, co / smaller)
+
+    def candidates(self, mac: str, top: int = 10, min_places: int = 2) -> list[AltIDCandidate]:
+        """Rank the devices most often seen alongside mac.
+
+        Only mac's own buckets are read, so this is cheap even on a large index.
+
+        Args:
+            mac (str): Target device
+            top (int): Number of candidates to return
+            min_places (int): Require co-occurrence in at least this many distinct grid cells;
+                devices that were only ever together in one place are usually just neighbours
+
+        Returns:
+            list[AltIDCandidate]: Best first, by distinct places then co-occurrences
+        """
+        device = self._ids.get(mac)
+        if device is None:
+            return []
+        co: Counter[int] = Counter()
+        places: dict[int, set[tuple[int, int]]] = defaultdict(set)
+        for key in self._device_buckets[device]:
+            bucket = self._buckets[key]
+            if len(bucket) > self.max_bucket:
+                continue
+            for other in bucket:
+                if other != device:
+                    co[other] += 1
+                    places[other].add(key[:2])
+        found = [
+            self._candidate(device, other, n, len(places[other]))
+            for other, n in co.items()
+            if len(places[other]) >= min_places
+        ]
+        found.sort(key=lambda i: (i.places, i.co_occurrences, i.score), reverse=True)
+        return found[:top]
+
+    def pairs(self, min_places: int = 2) -> list[AltIDCandidate]:
+        """Score every pair of devices that co-occurred in at least min_places distinct cells.
+
+        Buckets are visited one grid cell at a time so each pair's distinct places can be
+        counted without keeping a set per pair.
+        """
+        by_cell: dict[tuple[int, int], list[set[int]]] = defaultdict(list)
+        for key, bucket in self._buckets.items():
+            if 1 < len(bucket) <= self.max_bucket:
+                by_cell[key[:2]].append(bucket)
+
+        co: Counter[tuple[int, int]] = Counter()
+        places: Counter[tuple[int, int]] = Counter()
+        for buckets in by_cell.values():
+            cell_pairs = set()
+            for bucket in buckets:
+                for pair in combinations(sorted(bucket), 2):
+                    co[pair] += 1
+                    cell_pairs.add(pair)
+            places.update(cell_pairs)
+
+        found = [self._candidate(a, b, co[a, b], n) for (a, b), n in places.items() if n >= min_places]
+        found.sort(key=lambda i: (i.places, i.co_occurrences, i.score), reverse=True)
+        return found
+
+    def rank_all(self, top: int = 10, min_places: int = 2) -> dict[str, list[AltIDCandidate]]:
+        """Ranked alt-ID candidates for every device that has any."""
+        ranked: dict[str, list[AltIDCandidate]] = defaultdict(list)
+        for pair in self.pairs(min_places):
+            for mac, other in ((pair.mac, pair.other), (pair.other, pair.mac)):
+                if len(ranked[mac]) < top:
+                    ranked[mac].append(AltIDCandidate(mac, other, pair.co_occurrences, pair.places, pair.score))
+        return dict(ranked)
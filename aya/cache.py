@@ -0,0 +1,188 @@
+"""On-disk cache of parsed kismetdb devices.
+
+Each survey gets a small SQLite file holding only the fields aya extracts
+from the device JSON, so repeat runs over an unchanged kismetdb never decode
+a device blob. Entries are keyed by the survey's resolved path and are
+invalidated when its size or mtime changes. An index database tracks entry
+sizes and last use so the cache can be held under a size cap by evicting
+the least recently used surveys.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Callable, Iterable, Sequence
+
+from .KismetDevice import SUMMARY_FIELDS, KismetDevice
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 2
+DEFAULT_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", "~/.cache")).expanduser() / "aya"
+DEFAULT_MAX_BYTES = 2 * 1024**3
+LIST_FIELDS = ("probedSSIDs", "clients", "hashes")
+
+
+def file_signature(path: Path) -> tuple[str, int, int]:
+    """Return (resolved path, size, mtime in ns) used to detect a changed file."""
+    path = Path(path).resolve()
+    stat = path.stat()
+    return str(path), stat.st_size, stat.st_mtime_ns
+
+
+def _timestamp(value: datetime | None) -> float | None:
+    return value.timestamp() if value else None
+
+
+def _datetime(value: float | None) -> datetime | None:
+    return datetime.fromtimestamp(value, UTC) if value is not None else None
+
+
+class DeviceCache:
+    """LRU-evicted, per-survey cache of extracted KismetDevice fields.
+
+    Args:
+        cache_dir (Path): Folder holding the index and one entry file per survey
+        max_bytes (int): Total entry size to stay under; least recently used surveys are evicted first
+
+    """
+
+    def __init__(self, cache_dir: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect_index()) as con, con:
+            con.execute(
+                "create table if not exists entries ("
+                "key text primary key, path text, size int, mtime_ns int, "
+                "version int, bytes int, last_used real)"
+            )
+
+    def _connect_index(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.cache_dir / "index.sqlite", timeout=30)
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.sqlite"
+
+    def get_devs(
+        self,
+        kismet_file: Path,
+        devtype: Sequence[str] | None,
+        loader: Callable[[], Iterable[KismetDevice]],
+    ) -> list[KismetDevice]:
+        """Return the survey's devices from cache, filling it from loader() on a miss.
+
+        Args:
+            kismet_file (Path): The kismetdb file the devices come from
+            devtype (Optional Sequence[str]): kismetdb device types to return, all if empty
+            loader (Callable): Produces every device in kismet_file; only called on a miss
+
+        Returns:
+            list[KismetDevice]: Devices rebuilt from the cached fields
+
+        """
+        path, size, mtime_ns = file_signature(kismet_file)
+        key = hashlib.sha1(path.encode()).hexdigest()
+        entry = self._entry_path(key)
+        with closing(self._connect_index()) as con, con:
+            row = con.execute(
+                "select size, mtime_ns, version from entries where key = ?", (key,)
+            ).fetchone()
+            hit = row == (size, mtime_ns, CACHE_VERSION) and entry.exists()
+            if hit:
+                con.execute("update entries set last_used = ? where key = ?", (time.time(), key))
+        if not hit:
+            logger.info("Caching parsed devices for %s", path)
+            self._write_entry(entry, loader())
+            with closing(self._connect_index()) as con, con:
+                con.execute(
+                    "insert or replace into entries values (?, ?, ?, ?, ?, ?, ?)",
+                    (key, path, size, mtime_ns, CACHE_VERSION, entry.stat().st_size, time.time()),
+                )
+            self.evict(keep=key)
+        return self._read_entry(entry, devtype)
+
+    def _write_entry(self, entry: Path, devices: Iterable[KismetDevice]) -> None:
+        tmp = entry.with_suffix(f".{os.getpid()}.tmp")
+        tmp.unlink(missing_ok=True)
+        with closing(sqlite3.connect(tmp)) as con, con:
+            con.execute(
+                "create table devices (mac text, type text, name text, first_time real, last_time real, "
+                # Untyped columns so values come back as the type they went in as
+                f"{', '.join(SUMMARY_FIELDS)})"
+            )
+            con.executemany(
+                f"insert into devices values ({', '.join('?' * (5 + len(SUMMARY_FIELDS)))})",
+                (self._to_row(device) for device in devices),
+            )
+            con.execute("create index devices_type on devices (type)")
+        os.replace(tmp, entry)
+
+    @staticmethod
+    def _to_row(device: KismetDevice) -> tuple:
+        values = []
+        for field, value in device.summary().items():
+            if field in LIST_FIELDS:
+                # Most devices have nothing here, so empty lists are stored as NULL and never decoded
+                value = json.dumps(value) if value else None
+            values.append(value)
+        return (
+            device.mac,
+            device.device_type,
+            device.name,
+            _timestamp(device.first_time),
+            _timestamp(device.last_time),
+            *values,
+        )
+
+    def _read_entry(self, entry: Path, devtype: Sequence[str] | None) -> list[KismetDevice]:
+        query = "select * from devices"
+        params: list[str] = list(devtype or [])
+        if params:
+            query += f" where type in ({', '.join('?' * len(params))})"
+        devices = []
+        with closing(sqlite3.connect(entry)) as con:
+            for mac, devtype_, name, first_time, last_time, *values in con.execute(query, params):
+                summary = {
+                    field: (json.loads(value) if value else []) if field in LIST_FIELDS else value
+                    for field, value in zip(SUMMARY_FIELDS, values)
+                }
+                devices.append(KismetDevice.from_summary(
+                    mac,
+                    summary,
+                    first_time=_datetime(first_time),
+                    last_time=_datetime(last_time),
+                    device_type=devtype_,
+                    name=name,
+                ))
+        return devices
+
+    def evict(self, keep: str | None = None) -> None:
+        """Drop least recently used entries until the cache is under max_bytes."""
+        with closing(self._connect_index()) as con, con:
+            rows = con.execute("select key, bytes from entries order by last_used desc").fetchall()
+            total = sum(size for _, size in rows)
+            for key, size in reversed(rows):
+                if total <= self.max_bytes:
+                    break
+                if key == keep:
+                    continue
+                self._entry_path(key).unlink(missing_ok=True)
+                con.execute("delete from entries where key = ?", (key,))
+                total -= size
+                logger.info("Evicted cache entry %s", key)
+
+    def clear(self) -> None:
+        """Remove every cached survey."""
+        with closing(self._connect_index()) as con, con:
+            for (key,) in con.execute("select key from entries").fetchall():
+                self._entry_path(key).unlink(missing_ok=True)
+            con.execute("delete from entries")
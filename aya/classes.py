@@ -1,5 +1,6 @@
 from datetime import datetime
 from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Optional, List
 
 
@@ -116,7 +117,8 @@ class WigleDevice(WiFiDevice):
         lat: float = float(row[7])
         lon: float = float(row[8])
         alt: float = float(row[9])
-        first_seen = datetime.strptime(row[3], "%Y-%m-%d %H:%M:%S")
+        # fromisoformat parses Wigle's "%Y-%m-%d %H:%M:%S" far faster than strptime
+        first_seen = datetime.fromisoformat(row[3])
         geolocation = Geolocation(lat, lon, alt, first_seen)
         return create_wigle_device(
             mac_address=row[0],
@@ -135,6 +137,65 @@ class WigleDevice(WiFiDevice):
         )
 
 
+@dataclass
+class PseudoDevice(WiFiDevice):
+    """WiFi device inferred from several MAC addresses that appear to belong to one physical device."""
+
+    aliases: List[str] = field(default_factory=list)
+    probedSSIDs: List[str] = field(default_factory=list)
+    first_time: Optional[datetime] = None
+    last_time: Optional[datetime] = None
+    sources: List[Path] = field(default_factory=list)
+
+    def __post_init__(self):
+        if not self.device_type:
+            self.device_type = "Wi-Fi Pseudo-Device"
+
+    @property
+    def mac(self) -> str:
+        """The first MAC address seen for the device."""
+        return self.aliases[0] if self.aliases else self.identifier
+
+    def add_alias(
+        self,
+        mac: str,
+        first_time: Optional[datetime] = None,
+        last_time: Optional[datetime] = None,
+        source: Optional[Path] = None,
+    ) -> None:
+        """Record another MAC address for the device and widen its time span."""
+        if mac not in self.aliases:
+            self.aliases.append(mac)
+        if source is not None and source not in self.sources:
+            self.sources.append(source)
+        if first_time is not None and (self.first_time is None or first_time < self.first_time):
+            self.first_time = first_time
+        if last_time is not None and (self.last_time is None or last_time > self.last_time):
+            self.last_time = last_time
+
+
+@dataclass
+class SOIHit:
+    """A device that matched a device-of-interest target, and how it matched."""
+
+    device: Device
+    target: Device
+    matched_on: str
+
+
+@dataclass
+class SearchHit:
+    """One row of a project-wide device-of-interest search."""
+
+    target: str
+    file: Path
+    mac: str
+    matched_on: str
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+    signal: Optional[int] = None
+
+
 # Simple factory function to create devices from MAC addresses
 def create_wifi_device(mac_address: str, **kwargs) -> WiFiDevice:
     """Create a WiFi device using a MAC address as the identifier."""
@@ -144,3 +205,8 @@ def create_wifi_device(mac_address: str, **kwargs) -> WiFiDevice:
 def create_wigle_device(mac_address: str, **kwargs) -> WigleDevice:
     """Create a Wigle device using a MAC address as the identifier."""
     return WigleDevice(identifier=mac_address, **kwargs)
+
+
+def create_pseudo_device(identifier: str, **kwargs) -> PseudoDevice:
+    """Create a pseudo-device, e.g. keyed by a probe fingerprint."""
+    return PseudoDevice(identifier=identifier, **kwargs)
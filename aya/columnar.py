@@ -0,0 +1,134 @@
+"""Columnar (Arrow IPC / Parquet) snapshots of survey device tables.
+
+A snapshot holds one row per device with the fields aya extracts from the
+kismetdb JSON, plus the survey it came from. Arrow IPC files are read back
+through a memory map without copying, so cross-survey comparisons can run
+vectorized over the columns without touching SQLite or JSON. The Arrow
+table, or the per-survey slices from survey_tables, is the primary API;
+table_records turns rows back into DeviceRecords when objects are needed,
+at the cost of a copy. Requires pyarrow (pip install aya[columnar]).
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from .KismetDevice import DeviceRecord, KismetDevice
+
+SNAPSHOT_SCHEMA = pa.schema([
+    ("survey", pa.string()),
+    ("mac", pa.string()),
+    ("type", pa.string()),
+    ("name", pa.string()),
+    ("first_time", pa.timestamp("s", tz="UTC")),
+    ("last_time", pa.timestamp("s", tz="UTC")),
+    ("channel", pa.string()),
+    ("crypt", pa.string()),
+    ("min_signal", pa.int32()),
+    ("max_signal", pa.int32()),
+    ("last_signal", pa.int32()),
+    ("probed_ssids", pa.list_(pa.string())),
+    ("clients", pa.list_(pa.string())),
+    ("hashes", pa.list_(pa.string())),
+])
+
+
+def devices_table(devices: Iterable[KismetDevice | DeviceRecord], survey: str) -> pa.Table:
+    """Build a snapshot table from KismetDevices or DeviceRecords belonging to one survey."""
+    columns: dict[str, list] = {name: [] for name in SNAPSHOT_SCHEMA.names}
+    for device in devices:
+        if isinstance(device, KismetDevice):
+            device = DeviceRecord.from_kismet_device(device)
+        columns["survey"].append(survey)
+        columns["mac"].append(device.mac)
+        columns["type"].append(device.device_type)
+        columns["name"].append(device.name)
+        columns["first_time"].append(device.first_time)
+        columns["last_time"].append(device.last_time)
+        columns["channel"].append(str(device.channel) if device.channel else None)
+        columns["crypt"].append(device.crypt or None)
+        columns["min_signal"].append(device.min_signal)
+        columns["max_signal"].append(device.max_signal)
+        columns["last_signal"].append(device.last_signal)
+        columns["probed_ssids"].append(list(device.probed_ssids))
+        columns["clients"].append(list(device.clients))
+        columns["hashes"].append(list(device.hashes))
+    return pa.table(columns, schema=SNAPSHOT_SCHEMA)
+
+
+def surveys_table(surveys: Iterable[tuple[str, Iterable[KismetDevice | DeviceRecord] | pa.Table]]) -> pa.Table:
+    """Build one snapshot table from several (survey, devices) pairs. devices may already be a snapshot table."""
+    tables = [
+        devices if isinstance(devices, pa.Table) else devices_table(devices, survey)
+        for survey, devices in surveys
+    ]
+    return pa.concat_tables(tables) if tables else SNAPSHOT_SCHEMA.empty_table()
+
+
+def write_snapshot(table: pa.Table, path: Path) -> None:
+    """Write a snapshot as Parquet if path ends in .parquet, otherwise as an Arrow IPC file."""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        pq.write_table(table, path)
+        return
+    with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def read_snapshot(path: Path) -> pa.Table:
+    """Load a snapshot memory-mapped; Arrow IPC files are zero-copy, Parquet is decoded from the map."""
+    path = Path(path)
+    if path.suffix == ".parquet":
+        return pq.read_table(path, memory_map=True)
+    return pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+
+
+def survey_tables(table: pa.Table) -> dict[str, pa.Table]:
+    """Split a snapshot into one table per survey.
+
+    surveys_table writes each survey's rows contiguously, so every survey is a zero-copy
+    slice of the (memory-mapped) snapshot. Surveys whose rows are interleaved fall back
+    to a filtered copy.
+    """
+    column = table["survey"]
+    views = {}
+    for entry in pc.value_counts(column):
+        survey, count = entry["values"].as_py(), entry["counts"].as_py()
+        view = table.slice(pc.index(column, survey).as_py(), count)
+        if not pc.all(pc.equal(view["survey"], survey)).as_py():
+            view = table.filter(pc.equal(column, survey))
+        views[survey] = view
+    return views
+
+
+def table_records(table: pa.Table) -> dict[str, list[DeviceRecord]]:
+    """Turn a snapshot table back into DeviceRecords grouped by survey.
+
+    This copies every row into Python objects, so it is not zero-copy; keep to the
+    table's columns for bulk work and only materialize records where objects are needed.
+    """
+    columns = [table[name].to_pylist() for name in SNAPSHOT_SCHEMA.names]
+    surveys: dict[str, list[DeviceRecord]] = {}
+    for (survey, mac, devtype, name, first_time, last_time, channel, crypt, min_signal, max_signal,
+         last_signal, probed_ssids, clients, hashes) in zip(*columns):
+        surveys.setdefault(survey, []).append(DeviceRecord(
+            mac,
+            devtype,
+            name,
+            first_time,
+            last_time,
+            channel or "",
+            crypt or "",
+            min_signal,
+            max_signal,
+            last_signal,
+            tuple(probed_ssids or ()),
+            tuple(clients or ()),
+            tuple(hashes or ()),
+        ))
+    return surveys
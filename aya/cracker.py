@@ -0,0 +1,457 @@
+"""Local PMKID cracking service.
+
+CrackerService keeps a persistent SQLite queue of jobs (a PMKID plus a
+wordlist), works through them one at a time by splitting the wordlist into
+chunks checked by a process pool, and caps the chunks in flight so reading a
+huge wordlist never runs ahead of the workers. New submissions are refused
+once the queue is full. A small HTTP API submits jobs, returns results to the
+holder of the job's token, and exposes queue depth and throughput at /metrics.
+HashCrackerDevice is the client side of that API.
+
+    python -m aya.tools.crack_server --workers 4
+"""
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Iterator, Optional
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+from .cache import DEFAULT_CACHE_DIR
+from .classes import Device
+from .pmkid import PMKID
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = DEFAULT_CACHE_DIR / "cracker.sqlite"
+DEFAULT_PORT = 8622
+DEFAULT_CHUNK_SIZE = 1000
+DEFAULT_MAX_QUEUE = 1000
+
+QUEUED = "queued"
+RUNNING = "running"
+CRACKED = "cracked"
+EXHAUSTED = "exhausted"
+FAILED = "failed"
+
+SCHEMA = """
+create table if not exists jobs (
+    id integer primary key,
+    hash text not null,
+    wordlist text,
+    words text,
+    token_hash text not null,
+    status text not null,
+    submitted real not null,
+    started real,
+    finished real,
+    tried int not null default 0,
+    psk text,
+    error text
+);
+create index if not exists jobs_status on jobs (status, id);
+"""
+
+
+def pmkid_matches(psk: bytes, pmkid: PMKID) -> bool:
+    """Whether psk is the passphrase behind pmkid.
+
+    PMK = PBKDF2-HMAC-SHA1(psk, ssid, 4096, 32) and PMKID = HMAC-SHA1(PMK, "PMK Name" | AP | STA)[:16].
+    """
+    pmk = hashlib.pbkdf2_hmac("sha1", psk, pmkid.essid, 4096, 32)
+    message = b"PMK Name" + bytes.fromhex(pmkid.bssid.replace(":", "")) + bytes.fromhex(pmkid.client.replace(":", ""))
+    return hmac.compare_digest(hmac.new(pmk, message, hashlib.sha1).digest()[:16], bytes.fromhex(pmkid.pmkid))
+
+
+def crack_chunk(pmkid: PMKID, words: list[bytes]) -> tuple[int, Optional[str]]:
+    """Try every word of a chunk. Module level so it can run in the process pool.
+
+    Returns:
+        tuple[int, Optional[str]]: Words tried, and the passphrase if one matched
+    """
+    for tried, word in enumerate(words, 1):
+        # WPA passphrases are 8 to 63 characters
+        if 8 <= len(word) <= 63 and pmkid_matches(word, pmkid):
+            return tried, word.decode("utf-8", errors="replace")
+    return len(words), None
+
+
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _iter_chunks(job: sqlite3.Row, chunk_size: int) -> Iterator[list[bytes]]:
+    """The job's candidate words in chunks, streamed from its wordlist file."""
+    if job["words"]:
+        words = [i.encode() for i in json.loads(job["words"])]
+        for i in range(0, len(words), chunk_size):
+            yield words[i : i + chunk_size]
+        return
+    with open(job["wordlist"], "rb") as f:
+        chunk = []
+        for line in f:
+            chunk.append(line.rstrip(b"\r\n"))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+class QueueFull(Exception):
+    """Raised when a job is submitted to a full queue."""
+
+
+class CrackerService:
+    """Persistent job queue and bounded process pool.
+
+    Args:
+        path (Path): Queue database, created if missing
+        workers (Optional[int]): Worker processes, defaults to the CPU count
+        chunk_size (int): Words handed to a worker at a time
+        max_queue (int): Queued jobs beyond which submissions are refused
+
+    """
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_QUEUE_PATH,
+        workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.chunk_size = chunk_size
+        self.max_queue = max_queue
+        self.con = sqlite3.connect(self.path, check_same_thread=False)
+        self.con.row_factory = sqlite3.Row
+        self.con.executescript(SCHEMA)
+        self._db = threading.Lock()
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = ProcessPoolExecutor(self.workers)
+        # Keep every worker busy with one chunk waiting behind it, no more
+        self._slots = threading.BoundedSemaphore(self.workers * 2)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inflight = 0
+        self._words_total = 0
+        self._recent: deque[tuple[float, int]] = deque()
+        with self._db, self.con:
+            # Jobs interrupted by a restart start over
+            self.con.execute("update jobs set status = ?, tried = 0, started = null where status = ?", (QUEUED, RUNNING))
+
+    def submit(self, hash_line: str, wordlist: Optional[Path] = None, words: Optional[list[str]] = None) -> tuple[int, str]:
+        """Queue a PMKID against a wordlist file on this machine, or an explicit list of words.
+
+        Returns:
+            tuple[int, str]: Job id and the token needed to read its result
+
+        Raises:
+            ValueError: if the hash line is malformed, words isn't a list of strings or no candidates were given
+            FileNotFoundError: if wordlist does not exist
+            QueueFull: if max_queue jobs are already waiting
+        """
+        # Submissions come straight from HTTP clients, so check types before anything reaches the worker thread
+        if not isinstance(hash_line, str):
+            raise ValueError("The hash must be a hashcat 22000 line")
+        PMKID.from_hashcat_line(hash_line)
+        if words is not None:
+            if not isinstance(words, list) or not all(isinstance(i, str) for i in words):
+                raise ValueError("words must be a list of strings")
+        else:
+            if not isinstance(wordlist, (str, Path)):
+                raise ValueError("A wordlist or words are required")
+            if not Path(wordlist).is_file():
+                msg = f"File not found: {wordlist}"
+                raise FileNotFoundError(msg)
+        token = secrets.token_urlsafe(24)
+        with self._db, self.con:
+            if self.queue_depth() >= self.max_queue:
+                msg = f"{self.max_queue} jobs already queued"
+                raise QueueFull(msg)
+            job_id = self.con.execute(
+                "insert into jobs (hash, wordlist, words, token_hash, status, submitted) values (?, ?, ?, ?, ?, ?)",
+                (
+                    hash_line.strip(),
+                    str(wordlist) if wordlist else None,
+                    json.dumps(words) if words is not None else None,
+                    _hash_token(token),
+                    QUEUED,
+                    time.time(),
+                ),
+            ).lastrowid
+        self._wake.set()
+        return job_id, token
+
+    def result(self, job_id: int, token: str) -> Optional[dict]:
+        """A job's status, progress and passphrase. None if the job doesn't exist or the token is wrong."""
+        with self._db:
+            row = self.con.execute("select * from jobs where id = ?", (job_id,)).fetchone()
+        if row is None or not hmac.compare_digest(row["token_hash"], _hash_token(token)):
+            return None
+        return {
+            "id": row["id"],
+            "hash": row["hash"],
+            "status": row["status"],
+            "tried": row["tried"],
+            "submitted": row["submitted"],
+            "started": row["started"],
+            "finished": row["finished"],
+            "psk": row["psk"],
+            "error": row["error"],
+        }
+
+    def queue_depth(self) -> int:
+        return self.con.execute("select count(*) from jobs where status = ?", (QUEUED,)).fetchone()[0]
+
+    def metrics(self) -> dict[str, float]:
+        """Queue and throughput figures."""
+        now = time.monotonic()
+        with self._db:
+            counts = dict(self.con.execute("select status, count(*) from jobs group by status").fetchall())
+            while self._recent and now - self._recent[0][0] > 60:
+                self._recent.popleft()
+            window = sum(n for _, n in self._recent)
+            span = now - self._recent[0][0] if self._recent else 0
+        metrics = {f'jobs{{status="{status}"}}': counts.get(status, 0) for status in (QUEUED, RUNNING, CRACKED, EXHAUSTED, FAILED)}
+        metrics.update(
+            queue_depth=counts.get(QUEUED, 0),
+            workers=self.workers,
+            inflight_chunks=self._inflight,
+            words_tried_total=self._words_total,
+            words_per_second=window / span if span else 0.0,
+        )
+        return metrics
+
+    def _next_job(self) -> Optional[sqlite3.Row]:
+        with self._db, self.con:
+            row = self.con.execute("select * from jobs where status = ? order by id limit 1", (QUEUED,)).fetchone()
+            if row is not None:
+                self.con.execute("update jobs set status = ?, started = ? where id = ?", (RUNNING, time.time(), row["id"]))
+        return row
+
+    def _finish(self, job_id: int, status: str, psk: Optional[str] = None, error: Optional[str] = None) -> None:
+        with self._db, self.con:
+            self.con.execute(
+                "update jobs set status = ?, psk = ?, error = ?, finished = ? where id = ?",
+                (status, psk, error, time.time(), job_id),
+            )
+
+    def _run_job(self, job: sqlite3.Row) -> None:
+        pmkid = PMKID.from_hashcat_line(job["hash"])
+        found: list[str] = []
+        # Untested candidates mean the job can't be called exhausted
+        failed: list[BaseException] = []
+        pending: set[Future] = set()
+        done = threading.Condition()
+
+        def chunk_done(future: Future) -> None:
+            try:
+                if future.cancelled():
+                    return
+                if future.exception():
+                    logger.warning("Chunk of job %s failed: %r", job["id"], future.exception())
+                    failed.append(future.exception())
+                    return
+                tried, psk = future.result()
+                with self._db, self.con:
+                    self._words_total += tried
+                    self._recent.append((time.monotonic(), tried))
+                    self.con.execute("update jobs set tried = tried + ? where id = ?", (tried, job["id"]))
+                if psk is not None:
+                    found.append(psk)
+            finally:
+                # Only mark the chunk done once its outcome is recorded, or the job may finish without it
+                self._slots.release()
+                with done:
+                    pending.discard(future)
+                    self._inflight -= 1
+                    done.notify_all()
+
+        try:
+            for chunk in _iter_chunks(job, self.chunk_size):
+                # Blocks while every slot is taken: backpressure on the wordlist reader
+                self._slots.acquire()
+                if found or failed or self._stop.is_set():
+                    self._slots.release()
+                    break
+                try:
+                    future = self._pool.submit(crack_chunk, pmkid, chunk)
+                except BaseException:
+                    self._slots.release()
+                    raise
+                with done:
+                    pending.add(future)
+                    self._inflight += 1
+                future.add_done_callback(chunk_done)
+        except Exception as e:
+            failed.append(e)
+        with done:
+            if found or failed:
+                for future in list(pending):
+                    future.cancel()
+            done.wait_for(lambda: not pending)
+        if any(isinstance(e, BrokenProcessPool) for e in failed):
+            self._replace_pool()
+        if self._stop.is_set() and not found:
+            return
+        if found:
+            self._finish(job["id"], CRACKED, psk=found[0])
+            logger.info("Job %s cracked", job["id"])
+        elif failed:
+            self._finish(job["id"], FAILED, error=str(failed[0]) or repr(failed[0]))
+            logger.warning("Job %s failed: %r", job["id"], failed[0])
+        elif self.result_status(job["id"]) == RUNNING:
+            self._finish(job["id"], EXHAUSTED)
+            logger.info("Job %s exhausted its wordlist", job["id"])
+
+    def _replace_pool(self) -> None:
+        """Swap a broken process pool (a worker was killed, e.g. by the OOM killer) for a fresh one."""
+        logger.warning("Worker pool broke, starting a new one")
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = ProcessPoolExecutor(self.workers)
+
+    def result_status(self, job_id: int) -> Optional[str]:
+        with self._db:
+            row = self.con.execute("select status from jobs where id = ?", (job_id,)).fetchone()
+        return row[0] if row else None
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            job = self._next_job()
+            if job is None:
+                self._wake.wait(1.0)
+                self._wake.clear()
+                continue
+            try:
+                self._run_job(job)
+            except Exception as e:
+                # One bad job must not take the worker thread, and every job queued behind it, down
+                logger.exception("Job %s failed", job["id"])
+                self._finish(job["id"], FAILED, error=str(e))
+
+    def start(self) -> None:
+        """Start working through the queue in a background thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="aya-cracker", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop after the chunks in flight; an interrupted job is re-queued on the next start."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._pool.shutdown(cancel_futures=True)
+        with self._db, self.con:
+            self.con.execute("update jobs set status = ?, tried = 0, started = null where status = ?", (QUEUED, RUNNING))
+        self.con.close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service: CrackerService
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+    def _reply(self, status: int, body, content_type: str = "application/json") -> None:
+        data = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/metrics":
+            lines = [f"aya_cracker_{name} {value}" for name, value in self.service.metrics().items()]
+            return self._reply(200, "\n".join(lines) + "\n", "text/plain; version=0.0.4")
+        job = re.fullmatch(r"/jobs/(\d+)", url.path)
+        if job:
+            token = parse_qs(url.query).get("token", [""])[0] or self.headers.get("X-Job-Token", "")
+            result = self.service.result(int(job.group(1)), token)
+            if result is None:
+                return self._reply(404, {"error": "unknown job or wrong token"})
+            return self._reply(200, result)
+        self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/jobs":
+            return self._reply(404, {"error": "not found"})
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            job_id, token = self.service.submit(body["hash"], body.get("wordlist"), body.get("words"))
+        except QueueFull as e:
+            return self._reply(503, {"error": str(e)})
+        except (KeyError, ValueError, FileNotFoundError) as e:
+            return self._reply(400, {"error": str(e)})
+        self._reply(201, {"id": job_id, "token": token})
+
+
+def serve(service: CrackerService, address: str = "127.0.0.1", port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """Create the HTTP API for a service. Call serve_forever() on the result."""
+    handler = type("Handler", (_Handler,), {"service": service})
+    return ThreadingHTTPServer((address, port), handler)
+
+
+@dataclass
+class HashCrackerDevice(Device):
+    """A cracking service reachable over HTTP, identified by its endpoint URL."""
+
+    timeout: float = 10.0
+
+    def __post_init__(self):
+        if not self.device_type:
+            self.device_type = "Hash Cracker"
+
+    @property
+    def endpoint(self) -> str:
+        return self.identifier.rstrip("/")
+
+    def submit(self, pmkid: PMKID | str, wordlist: Optional[Path] = None, words: Optional[list[str]] = None) -> tuple[int, str]:
+        """Queue a PMKID (or hashcat line). Keep the returned token, it's the only way to read the result."""
+        line = pmkid.hashcat_line() if isinstance(pmkid, PMKID) else pmkid
+        payload = {"hash": line, "wordlist": str(wordlist) if wordlist else None, "words": words}
+        response = requests.post(f"{self.endpoint}/jobs", json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        body = response.json()
+        return body["id"], body["token"]
+
+    def result(self, job_id: int, token: str) -> dict:
+        response = requests.get(f"{self.endpoint}/jobs/{job_id}", headers={"X-Job-Token": token}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def metrics(self) -> dict[str, float]:
+        response = requests.get(f"{self.endpoint}/metrics", timeout=self.timeout)
+        response.raise_for_status()
+        metrics = {}
+        for line in response.text.splitlines():
+            name, _, value = line.rpartition(" ")
+            metrics[name.removeprefix("aya_cracker_")] = float(value)
+        return metrics
+
+    @property
+    def queue_length(self) -> int:
+        return int(self.metrics()["queue_depth"])
@@ -0,0 +1,135 @@
+"""Minimal parsing of raw 802.11 frames as stored by Kismet and in pcaps.
+
+Only the header fields aya uses are decoded: frame type/subtype, the three
+addresses, the sequence number and, for management frames, the SSID element.
+"""
+
+from __future__ import annotations
+
+import struct
+from typing import NamedTuple, Optional
+
+DLT_IEEE802_11 = 105
+DLT_IEEE802_11_RADIO = 127
+DOT11_DLTS = (DLT_IEEE802_11, DLT_IEEE802_11_RADIO)
+
+TYPE_MANAGEMENT = 0
+TYPE_CONTROL = 1
+TYPE_DATA = 2
+
+SUBTYPE_PROBE_REQ = 4
+SUBTYPE_PROBE_RESP = 5
+SUBTYPE_BEACON = 8
+
+# Frame control byte of a probe request: version 0, management, subtype 4
+PROBE_REQ_FC = 0x40
+
+# Length of the fixed fields before the tagged elements, per management subtype that carries an SSID
+_FIXED_FIELDS = {0: 4, 1: 6, 2: 10, 3: 6, 4: 0, 5: 12, 8: 12}
+
+_le16 = struct.Struct("<H")
+
+
+class Dot11Frame(NamedTuple):
+    """Header fields of one 802.11 frame. Absent addresses/fields are None."""
+
+    type: int
+    subtype: int
+    ra: str
+    ta: Optional[str]
+    bssid: Optional[str]
+    seq: Optional[int]
+    ssid: Optional[str] = None
+
+
+def format_mac(raw: bytes) -> str:
+    """Format 6 address bytes the way Kismet does (AA:BB:CC:DD:EE:FF)."""
+    return raw.hex(":").upper()
+
+
+def radiotap_length(packet: bytes) -> int:
+    """Length of the radiotap header at the start of packet, 0 if it's too short to have one."""
+    if len(packet) < 4:
+        return 0
+    return _le16.unpack_from(packet, 2)[0]
+
+
+def _ssid(packet: bytes, offset: int) -> Optional[str]:
+    """Find the SSID element in the tagged parameters starting at offset."""
+    end = len(packet)
+    while offset + 2 <= end:
+        tag, length = packet[offset], packet[offset + 1]
+        if tag == 0:
+            return packet[offset + 2 : offset + 2 + length].decode("utf-8", errors="replace")
+        offset += 2 + length
+    return None
+
+
+def parse_dot11(packet: bytes, offset: int = 0) -> Optional[Dot11Frame]:
+    """Parse the 802.11 header starting at offset.
+
+    Args:
+        packet (bytes): Captured frame
+        offset (int): Where the 802.11 header starts, e.g. after radiotap
+
+    Returns:
+        Optional[Dot11Frame]: None if the frame is truncated
+    """
+    if len(packet) < offset + 10:
+        return None
+    fc = packet[offset]
+    ftype = (fc >> 2) & 3
+    subtype = fc >> 4
+    ra = format_mac(packet[offset + 4 : offset + 10])
+    if ftype == TYPE_CONTROL:
+        # Only RTS/block-ack style control frames carry a transmitter address
+        ta = format_mac(packet[offset + 10 : offset + 16]) if len(packet) >= offset + 16 else None
+        return Dot11Frame(ftype, subtype, ra, ta, None, None)
+    if len(packet) < offset + 24:
+        return None
+    ta = format_mac(packet[offset + 10 : offset + 16])
+    bssid = format_mac(packet[offset + 16 : offset + 22])
+    seq = _le16.unpack_from(packet, offset + 22)[0] >> 4
+    ssid = None
+    if ftype == TYPE_MANAGEMENT and subtype in _FIXED_FIELDS:
+        ssid = _ssid(packet, offset + 24 + _FIXED_FIELDS[subtype])
+    return Dot11Frame(ftype, subtype, ra, ta, bssid, seq, ssid)
+
+
+def seq_frame(packet: bytes, dlt: int = DLT_IEEE802_11_RADIO, probes_only: bool = True) -> Optional[tuple[str, int]]:
+    """(transmitter, sequence number) of a frame, reading only the frame control, address 2 and sequence control fields.
+
+    Args:
+        packet (bytes): Captured frame with link type dlt (radiotap or bare 802.11)
+        dlt (int): Link type of packet
+        probes_only (bool): Only accept probe requests, the frames MAC randomizing clients send unassociated
+
+    Returns:
+        Optional[tuple[str, int]]: None for other link types, truncated frames, control frames and, with probes_only, anything but a probe request
+    """
+    if dlt == DLT_IEEE802_11_RADIO:
+        offset = radiotap_length(packet)
+    elif dlt == DLT_IEEE802_11:
+        offset = 0
+    else:
+        return None
+    if len(packet) < offset + 24:
+        return None
+    fc = packet[offset]
+    if probes_only:
+        if fc != PROBE_REQ_FC:
+            return None
+    elif (fc >> 2) & 3 == TYPE_CONTROL:
+        # Control frames have no sequence number
+        return None
+    seq = (packet[offset + 22] | packet[offset + 23] << 8) >> 4
+    return format_mac(packet[offset + 10 : offset + 16]), seq
+
+
+def parse_frame(packet: bytes, dlt: int = DLT_IEEE802_11_RADIO) -> Optional[Dot11Frame]:
+    """Parse a frame captured with link type dlt (radiotap or bare 802.11)."""
+    if dlt == DLT_IEEE802_11_RADIO:
+        return parse_dot11(packet, radiotap_length(packet))
+    if dlt == DLT_IEEE802_11:
+        return parse_dot11(packet)
+    return None
@@ -1,16 +1,21 @@
 from __future__ import annotations
 
-import itertools
 import json
 import logging
 import re
 import sqlite3
+import time
+from collections import namedtuple
+from contextlib import closing
 from datetime import UTC, datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Sequence
+from typing import Iterator, NamedTuple, Sequence
 
-from .classes import BluetoothDevice, Device, WiFiDevice
-from .KismetDevice import KismetDevice, create_kismet_device
+from .cache import DeviceCache
+from .classes import BluetoothDevice, Device, SOIHit, WiFiDevice
+from .KismetDevice import DeviceRecord, KismetDevice, create_kismet_device
+from .spectrum import survey_spectrum
 
 logging.basicConfig(
     level=logging.INFO,
@@ -18,11 +23,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def extract_json(row: tuple) -> KismetDevice:
+def extract_json(row: tuple, lazy: bool = False) -> KismetDevice:
     """Extract and parse the JSON data from a Kismet database device row.
 
     Args:
         row (tuple): A tuple representing a row from the device table.
+        lazy (bool): Keep the raw device blob and only decode it when metadata is first read.
 
     Returns:
         KismetDevice: The parsed JSON data as a KismetDevice object.
@@ -36,6 +42,14 @@ def extract_json(row: tuple) -> KismetDevice:
     mac: str = row[4]
     devtype: str = row[13]
     rawjson: str = row[14]
+    if lazy:
+        return create_kismet_device(
+            mac,
+            first_time=first_time,
+            last_time=last_time,
+            device_type=devtype,
+            raw_json=rawjson,
+        )
     try:
         real_json: dict = json.loads(rawjson)
     except json.decoder.JSONDecodeError as e:
@@ -53,70 +67,308 @@ def extract_json(row: tuple) -> KismetDevice:
     )
 
 
-def get_devs(
-    kismet_file: Path, devtype: list[str] | None = None,
-) -> list[KismetDevice]:
-    """Get devices from a kismet file.
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_FOLLOW_INTERVAL = 5.0
+# Past this many SOI targets, match_soi joins against a temp table instead of binding an IN list
+SOI_TEMP_TABLE_THRESHOLD = 500
+DEVICE_COLUMNS = (
+    "first_time",
+    "last_time",
+    "devkey",
+    "phyname",
+    "devmac",
+    "strongest_signal",
+    "min_lat",
+    "min_lon",
+    "max_lat",
+    "max_lon",
+    "avg_lat",
+    "avg_lon",
+    "bytes_data",
+    "type",
+    "device",
+)
+
+
+@lru_cache
+def _device_row_type(fields: tuple[str, ...]) -> type[NamedTuple]:
+    """Build (once per projection) the DeviceRow namedtuple for a column list."""
+    unknown = [i for i in fields if i not in DEVICE_COLUMNS]
+    if unknown or not fields:
+        msg = f"Unknown devices columns: {unknown}. Expected any of {DEVICE_COLUMNS}"
+        raise ValueError(msg)
+    base = namedtuple("DeviceRow", fields)
+    # Generated classes can't be found by name, so pickle rows via their column list
+    return type("DeviceRow", (base,), {"__slots__": (), "__reduce__": _reduce_device_row})
+
+
+def _reduce_device_row(row: NamedTuple) -> tuple:
+    return _rebuild_device_row, (row._fields, tuple(row))
+
+
+def _rebuild_device_row(fields: tuple[str, ...], values: tuple) -> NamedTuple:
+    return _device_row_type(fields)._make(values)
+
+
+def _normalize_devtype(devtype: str | Sequence[str] | None) -> list[str]:
+    """Turn a devtype argument into a list of kismetdb types, empty meaning all."""
+    if isinstance(devtype, str):
+        devtype = [devtype]
+    if not devtype or "all" in devtype:
+        return []
+    return list(devtype)
+
+
+def _query_devices(
+    kismet_file: Path,
+    where: str = "",
+    params: Sequence = (),
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    columns: Sequence[str] = DEVICE_COLUMNS,
+) -> Iterator[tuple]:
+    """Stream raw rows from the devices table in fetchmany batches."""
+    query = f"select {', '.join(columns)} from devices"
+    if where:
+        query = f"{query} where {where}"
+    with closing(sqlite3.connect(kismet_file)) as con:
+        cur = con.execute(query, tuple(params))
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            yield from rows
+
+
+def iter_devs(
+    kismet_file: Path,
+    devtype: list[str] | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    lazy: bool = False,
+    since: float | None = None,
+) -> Iterator[KismetDevice]:
+    """Lazily yield devices from a kismet file.
+
+    Rows are pulled from SQLite in batches of `batch_size`, so only one batch is held in memory at a time.
 
     Args:
         kismet_file (Path): The path to a kismetdb file
         devtype (Optional list[str]): kismetdb device types to pull. Will pull all devices if not provided.
+        batch_size (int): Number of rows fetched from the database per round trip.
+        lazy (bool): Defer JSON decoding of each device until its metadata is first read.
+        since (Optional float): Only pull devices whose last_time is at or after this epoch time.
+            Kismet rewrites a device's row as it updates, so this reads the delta of a growing file.
 
     Returns:
-        list[dict]: A list of all the json dumps from all Wi-Fi Access Points in the db.
+        Iterator[KismetDevice]: A generator of parsed devices.
 
     Raises:
         FileNotFoundError: if kismet_file does not exist
-        sqlite3.OperationalError: If the query fails for whatever reason
+        sqlite3.OperationalError: If the query fails for whatever reason (raised on iteration)
 
     """
     if not Path.exists(kismet_file):
         msg = f"File not found: {kismet_file}"
         raise FileNotFoundError(msg)
-    if isinstance(devtype, str):
-        devtype = [devtype]
-    if devtype is None:
-        devtype = ["all"]
-    devtype = [f"'{i}'" for i in devtype]
-    con = sqlite3.connect(kismet_file)
-    cur = con.cursor()
-    if devtype == ["'all'"]:
-        query = "select * from devices"
+    where, params = _device_filter(devtype, since)
+    rows = _query_devices(kismet_file, where, params, batch_size)
+    return (extract_json(row, lazy) for row in rows)
+
+
+def _device_filter(devtype: list[str] | None, since: float | None = None) -> tuple[str, list]:
+    """Build the devices where clause and parameters for a devtype and last_time filter."""
+    devtype = _normalize_devtype(devtype)
+    clauses, params = [], list(devtype)
+    if devtype:
+        clauses.append(f"type in ({', '.join('?' * len(devtype))})")
+    if since is not None:
+        clauses.append("last_time >= ?")
+        params.append(since)
+    return " and ".join(clauses), params
+
+
+def follow(
+    kismet_file: Path,
+    devtype: list[str] | None = None,
+    interval: float = DEFAULT_FOLLOW_INTERVAL,
+    since: float | None = None,
+    idle: float | None = None,
+    lazy: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[KismetDevice]:
+    """Tail a kismetdb that Kismet is still writing, yielding devices as they appear or update.
+
+    The database is opened read-only through a URI, which reads alongside Kismet's WAL without
+    taking write locks. Every `interval` seconds the devices table is polled for rows whose
+    last_time is at or past the newest one already yielded, so each poll only decodes what changed.
+    The first pass, which may be the whole survey, is streamed in batches. Later polls are small,
+    so they are read in one short transaction before any row is yielded; a slow consumer then
+    never holds a WAL snapshot open and blocks Kismet's checkpoints.
+
+    Args:
+        kismet_file (Path): The path to a kismetdb file
+        devtype (Optional list[str]): kismetdb device types to pull. Will pull all devices if not provided.
+        interval (float): Seconds between polls.
+        since (Optional float): Start from this epoch time instead of reading every existing device first.
+        idle (Optional float): Stop once this many seconds pass without a new or updated device. Follows forever if not set.
+        lazy (bool): Defer JSON decoding of each device until its metadata is first read.
+        batch_size (int): Number of rows fetched from the database per round trip.
+
+    Returns:
+        Iterator[KismetDevice]: New devices, and devices again whenever their last_time advances.
+
+    Raises:
+        FileNotFoundError: if kismet_file does not exist
+        sqlite3.OperationalError: If the query fails for whatever reason (raised on iteration)
+
+    """
+    if not Path.exists(kismet_file):
+        msg = f"File not found: {kismet_file}"
+        raise FileNotFoundError(msg)
+    where, params = _device_filter(devtype)
+    query = f"select {', '.join(DEVICE_COLUMNS)} from devices where {where + ' and ' if where else ''}last_time >= ?"
+    watermark = since or 0
+    # devkeys already yielded at the watermark, which the inclusive last_time filter returns again
+    boundary: set[str] = set()
+    quiet_since = time.monotonic()
+    first_pass = True
+    with closing(sqlite3.connect(f"{Path(kismet_file).resolve().as_uri()}?mode=ro", uri=True)) as con:
+        while True:
+            cur = con.execute(query, [*params, watermark])
+            rows = _fetch_batches(cur, batch_size)
+            if not first_pass:
+                rows = list(rows)
+            newest, at_newest, changed = watermark, set(), False
+            for row in rows:
+                if row[1] == watermark and row[2] in boundary:
+                    continue
+                if row[1] > newest:
+                    newest, at_newest = row[1], set()
+                if row[1] == newest:
+                    at_newest.add(row[2])
+                changed = True
+                yield extract_json(row, lazy)
+            cur.close()
+            first_pass = False
+            if changed:
+                if newest > watermark:
+                    watermark, boundary = newest, at_newest
+                else:
+                    boundary |= at_newest
+                quiet_since = time.monotonic()
+            elif idle is not None and time.monotonic() - quiet_since >= idle:
+                return
+            time.sleep(interval)
+
+
+def _fetch_batches(cur: sqlite3.Cursor, batch_size: int) -> Iterator[tuple]:
+    while batch := cur.fetchmany(batch_size):
+        yield from batch
+
+
+def iter_device_rows(
+    kismet_file: Path,
+    fields: Sequence[str] = ("devmac", "type"),
+    devtype: list[str] | None = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[NamedTuple]:
+    """Lazily yield only the requested devices columns from a kismet file.
+
+    The column list is pushed into the SQL query, so leaving out `device` means the JSON blobs are never read.
+
+    Args:
+        kismet_file (Path): The path to a kismetdb file
+        fields (Sequence[str]): devices table columns to select, see `DEVICE_COLUMNS`.
+        devtype (Optional list[str]): kismetdb device types to pull. Will pull all devices if not provided.
+        batch_size (int): Number of rows fetched from the database per round trip.
+
+    Returns:
+        Iterator[DeviceRow]: namedtuples with one attribute per requested column.
+
+    Raises:
+        FileNotFoundError: if kismet_file does not exist
+        ValueError: if fields contains something that isn't a devices column
+
+    """
+    if not Path.exists(kismet_file):
+        msg = f"File not found: {kismet_file}"
+        raise FileNotFoundError(msg)
+    fields = tuple(fields)
+    row_type = _device_row_type(fields)
+    devtype = _normalize_devtype(devtype)
+    where = f"type in ({', '.join('?' * len(devtype))})" if devtype else ""
+    rows = _query_devices(kismet_file, where, devtype, batch_size, columns=fields)
+    return (row_type._make(row) for row in rows)
+
+
+def get_devs(
+    kismet_file: Path,
+    devtype: list[str] | None = None,
+    lazy: bool = False,
+    fields: Sequence[str] | None = None,
+    cache: DeviceCache | bool | None = None,
+    compact: bool = False,
+) -> list[KismetDevice] | list[DeviceRecord] | list[NamedTuple]:
+    """Get devices from a kismet file.
+
+    Args:
+        kismet_file (Path): The path to a kismetdb file
+        devtype (Optional list[str]): kismetdb device types to pull. Will pull all devices if not provided.
+        lazy (bool): Defer JSON decoding of each device until its metadata is first read.
+        fields (Optional Sequence[str]): Only select these devices columns and return DeviceRows instead.
+        cache (Optional DeviceCache | bool): Serve devices from an on-disk cache of their extracted fields,
+            True uses the default cache. Cached devices have empty metadata/dot11.
+        compact (bool): Return slotted DeviceRecords holding only the extracted fields.
+
+    Returns:
+        list[KismetDevice]: All matching devices in the db, or DeviceRows if `fields` is given.
+
+    Raises:
+        FileNotFoundError: if kismet_file does not exist
+        sqlite3.OperationalError: If the query fails for whatever reason
+
+    """
+    if fields:
+        return list(iter_device_rows(kismet_file, fields, devtype))
+    if cache:
+        if cache is True:
+            cache = DeviceCache()
+        if not Path.exists(kismet_file):
+            msg = f"File not found: {kismet_file}"
+            raise FileNotFoundError(msg)
+        devices = cache.get_devs(kismet_file, _normalize_devtype(devtype), lambda: iter_devs(kismet_file))
     else:
-        query = f"select * from devices where type in ({', '.join(devtype)})"
-    cur.execute(query)
-    devs = []
-    for device in cur:
-        dev = extract_json(device)
-        if dev:
-            devs.append(dev)
-    return devs
+        devices = iter_devs(kismet_file, devtype, lazy=lazy or compact)
+    if compact:
+        return [DeviceRecord.from_kismet_device(i) for i in devices]
+    return list(devices)
 
 
-def get_access_points(kismet_file: Path) -> list[KismetDevice]:
+def get_access_points(kismet_file: Path, cache: DeviceCache | bool | None = None) -> list[KismetDevice]:
     """Get all Access Points from a kismet file.
 
     Args:
         kismet_file (Path): The path to a kismetdb file
+        cache (Optional DeviceCache | bool): See get_devs
 
     Returns:
         list[dict]: A list of all the json dumps from all Wi-Fi Access Points in the db.
 
     """
-    return get_devs(kismet_file, ["Wi-Fi AP", "Wi-Fi Bridged"])
+    return get_devs(kismet_file, ["Wi-Fi AP", "Wi-Fi Bridged"], cache=cache)
 
 
-def get_stas(kismet_file: Path) -> list[KismetDevice]:
+def get_stas(kismet_file: Path, cache: DeviceCache | bool | None = None) -> list[KismetDevice]:
     """Get all Wi-Fi Devices/Clients from a kismet file.
 
     Args:
         kismet_file (Path): The path to a kismetdb file
+        cache (Optional DeviceCache | bool): See get_devs
 
     Returns:
         list[dict]: A list of all the json dumps from all Wi-Fi STAs in the db.
 
     """
-    return get_devs(kismet_file, ["Wi-Fi Client", "Wi-Fi Device"])
+    return get_devs(kismet_file, ["Wi-Fi Client", "Wi-Fi Device"], cache=cache)
 
 
 def check_filepaths(filepaths: list[Path]) -> None:
@@ -152,49 +404,135 @@ def get_basepath() -> Path:
     return Path(basepath)
 
 
-def find_soi(kismet_file: Path, targets: Sequence[Device]) -> list[KismetDevice | BluetoothDevice]:
-    """Find devices of interest in a Kismet database file.
+def normalize_mac(mac: str) -> str:
+    """Put a MAC into kismetdb's AA:BB:CC:DD:EE:FF form, or just upper-case it if it isn't 12 hex digits."""
+    digits = re.sub(r"[^0-9a-fA-F]", "", mac)
+    if len(digits) != 12:
+        return mac.strip().upper()
+    return ":".join(digits[i : i + 2] for i in range(0, 12, 2)).upper()
+
 
-    Supports MAC and SSID matching.
+def _sql_value_set(
+    con: sqlite3.Connection, name: str, values: Sequence[str], threshold: int,
+) -> tuple[str, list[str]]:
+    """Return an SQL set expression for use after `in`.
+
+    Small sets are bound as parameters; larger ones are loaded into an indexed
+    temp table so SQLite can join against it instead of scanning a huge IN list.
+    """
+    if len(values) <= threshold:
+        return f"({', '.join('?' * len(values))})", list(values)
+    con.execute(f"create temp table {name} (value text primary key)")
+    con.executemany(f"insert or ignore into {name} values (?)", ((i,) for i in values))
+    return f"(select value from {name})", []
+
+
+def match_soi(
+    kismet_file: Path, targets: Sequence[Device], temp_table_threshold: int = SOI_TEMP_TABLE_THRESHOLD,
+) -> list[SOIHit]:
+    """Find devices of interest in a Kismet database file and report which target each matched.
+
+    MAC, Bluetooth and SSID targets are matched in a single query. MACs are
+    normalized and compared on the devmac column; SSIDs are compared against
+    the AP common name extracted in SQL, so only matching rows reach Python.
 
     Args:
         kismet_file (Path): The path to the Kismet database file.
         targets (Sequence[Device]): A sequence of `Device` objects to search for.
+        temp_table_threshold (int): Target lists longer than this are joined through a temp table.
 
     Returns:
-        list[KismetDevice]: A list of `KismetDevice` matches
+        list[SOIHit]: One hit per (device, target) pair, matched_on being "mac", "bluetooth" or "ssid"
 
     Raises:
         FileNotFoundError: If the specified Kismet database file does not exist.
+        sqlite3.OperationalError: If the query fails for whatever reason
 
     """
     if not Path.exists(kismet_file):
         msg = f"File not found: {kismet_file}"
         raise FileNotFoundError(msg)
-    wifi_targets: list[WiFiDevice] = [i for i in targets if isinstance(i, WiFiDevice)]
-    bt_targets: list[str] = [i.identifier for i in targets if isinstance(i, BluetoothDevice)]
-    target_macs = [i.mac for i in wifi_targets]
-    target_ssids = [i.name for i in wifi_targets]
+    mac_targets: dict[str, list[tuple[Device, str]]] = {}
+    ssid_targets: dict[str, list[Device]] = {}
+    for target in targets:
+        if isinstance(target, BluetoothDevice):
+            mac_targets.setdefault(normalize_mac(target.identifier), []).append((target, "bluetooth"))
+        elif isinstance(target, WiFiDevice):
+            mac_targets.setdefault(normalize_mac(target.mac), []).append((target, "mac"))
+            if target.name:
+                ssid_targets.setdefault(target.name, []).append(target)
+    if not mac_targets and not ssid_targets:
+        return []
+
+    hits = []
+    with closing(sqlite3.connect(kismet_file)) as con:
+        clauses, params = [], []
+        if mac_targets:
+            expr, values = _sql_value_set(con, "soi_macs", list(mac_targets), temp_table_threshold)
+            clauses.append(f"devmac in {expr}")
+            params += values
+        if ssid_targets:
+            expr, values = _sql_value_set(con, "soi_ssids", list(ssid_targets), temp_table_threshold)
+            # Cast so SQLite reads the blob as JSON text rather than JSONB
+            clauses.append(
+                "(type = 'Wi-Fi AP' and json_valid(cast(device as text)) and "
+                f"json_extract(cast(device as text), '$.\"kismet.device.base.commonname\"') in {expr})"
+            )
+            params += values
+        query = f"select {', '.join(DEVICE_COLUMNS)} from devices where {' or '.join(clauses)}"
+        for row in con.execute(query, params):
+            device = extract_json(row, lazy=True)
+            for target, matched_on in mac_targets.get(device.mac, []):
+                hits.append(SOIHit(device, target, matched_on))
+            if device.device_type == "Wi-Fi AP" and device.name in ssid_targets:
+                hits.extend(SOIHit(device, target, "ssid") for target in ssid_targets[device.name])
+    return hits
+
+
+def load_soi(soi_file: Path) -> list[WiFiDevice]:
+    """Read a device-of-interest file with one MAC per line into WiFiDevice targets."""
+    with open(soi_file) as f:
+        return [WiFiDevice(normalize_mac(i)) for i in f if i.strip()]
+
+
+def find_soi(kismet_file: Path, targets: Sequence[Device]) -> list[KismetDevice | BluetoothDevice]:
+    """Find devices of interest in a Kismet database file.
+
+    Supports MAC and SSID matching. See match_soi to also get the matching target.
+
+    Args:
+        kismet_file (Path): The path to the Kismet database file.
+        targets (Sequence[Device]): A sequence of `Device` objects to search for.
+
+    Returns:
+        list[KismetDevice]: A list of `KismetDevice` matches
+
+    Raises:
+        FileNotFoundError: If the specified Kismet database file does not exist.
+
+    """
     try:
-        devices = get_devs(kismet_file)
-    except sqlite3.OperationalError:
-        devices = []
-    bt_hits = [i for i in devices if i.mac in bt_targets]
-    mac_hits = [i for i in devices if i.mac in target_macs]
-    aps = [i for i in devices if i.device_type == "Wi-Fi AP"]
-    ssid_hits = [i for i in aps if i.name in target_ssids]
-    return list(mac_hits + ssid_hits + bt_hits)
+        hits = match_soi(kismet_file, targets)
+    except sqlite3.OperationalError as e:
+        logger.warning("Error reading %s: %s", kismet_file, e)
+        return []
+    devices = {id(hit.device): hit.device for hit in hits}
+    return list(devices.values())
 
 
-def find_oui_matches(kismet_file: Path, oui_list: list[str]) -> list[KismetDevice]:
+def find_oui_matches(
+    kismet_file: Path, oui_list: list[str], lazy: bool = False, fields: Sequence[str] | None = None,
+) -> list[KismetDevice] | list[NamedTuple]:
     """Get all devices matching given OUIs.
 
     Args:
         kismet_file (Path): kismetdb to pull devices from
         oui_list (list[str]): list of MAC addresses or OUIs to be matched to
+        lazy (bool): Defer JSON decoding of each device until its metadata is first read.
+        fields (Optional Sequence[str]): Only select these devices columns and return DeviceRows instead.
 
     Returns:
-        list[KismetDevice]: Matching devices
+        list[KismetDevice]: Matching devices, or DeviceRows if `fields` is given
 
     Raises:
         FileNotFoundError: if kismet_file does not exist
@@ -204,19 +542,14 @@ def find_oui_matches(kismet_file: Path, oui_list: list[str]) -> list[KismetDevic
     if not Path.exists(kismet_file):
         msg = f"File not found: {kismet_file}"
         raise FileNotFoundError(msg)
-    oui_list = [f'"{clean_oui(i)}"' for i in oui_list]
-    oui_joined = ", ".join(oui_list)
-    con = sqlite3.connect(kismet_file)
-    cur = con.cursor()
-    query = f"select * from devices where substr(devmac,1,8) in ({oui_joined})"
-    try:
-        cur.execute(query)
-    except sqlite3.OperationalError as e:
-        raise e
-    devs = []
-    for device in cur:
-        devs.append(extract_json(device))
-    return devs
+    ouis = [oui for oui in (clean_oui(i) for i in oui_list) if oui]
+    if not ouis:
+        return []
+    where = f"substr(devmac,1,8) in ({', '.join('?' * len(ouis))})"
+    if fields:
+        row_type = _device_row_type(tuple(fields))
+        return [row_type._make(row) for row in _query_devices(kismet_file, where, ouis, columns=row_type._fields)]
+    return [extract_json(row, lazy) for row in _query_devices(kismet_file, where, ouis)]
 
 
 def clean_oui(oui: str) -> str:
@@ -238,8 +571,9 @@ def clean_oui(oui: str) -> str:
     return ":".join(oui_pairs).upper()
 
 
+@lru_cache(maxsize=None)
 def generate_24g_channels():
-    """Get dict containing center freq / freq ranges for all 14 2.4GHz wifi channels."""
+    """Get dict containing center freq / freq ranges for all 14 2.4GHz wifi channels. Built once, don't mutate it."""
     channel_map = {}
     for i in range(1, 14):
         freq = 2407 + (i * 5)
@@ -248,48 +582,26 @@ def generate_24g_channels():
     return channel_map
 
 
+@lru_cache(maxsize=None)
 def generate_5g_channels():
-    """Get dict containing center freq / freq ranges for all 5GHz wifi channels."""
+    """Get dict containing center freq / freq ranges for all 5GHz wifi channels. Built once, don't mutate it."""
     channelwidths = [
         [[180, 182, 184, 187, 189], 10],
         [[34, 38, 46, 54, 62, 102, 110, 118, 126, 134, 142, 151, 159, 167, 175], 40],
         [[42, 58, 106, 122, 138, 155, 171], 80],
         [[50, 114, 163], 160],
     ]
-
-    channelwidths.append(
-        [
-            [
-                i
-                for i in range(200)
-                if i
-                not in list(
-                    itertools.chain(
-                        channelwidths[0][0],
-                        channelwidths[1][0],
-                        channelwidths[2][0],
-                        channelwidths[3][0],
-                    )
-                )
-            ],
-            20,
-        ]
-    )
-    for i in channelwidths:
-        print(i)
+    # Every other channel number is a 20MHz channel
+    widths = {channel: width for channels, width in channelwidths for channel in channels}
 
     channel_map = {}
     for i in range(200):
         freq = (i * 5) + 5000
-        freqwidth = 0
-        for channelwidth in channelwidths:
-            if i in channelwidth[0]:
-                freqwidth = int(channelwidth[1] * 0.5)
-                channel_map[i] = {
-                    "center": freq,
-                    "range": [freq - freqwidth, freq + freqwidth],
-                }
-                break
+        freqwidth = widths.get(i, 20) // 2
+        channel_map[i] = {
+            "center": freq,
+            "range": [freq - freqwidth, freq + freqwidth],
+        }
     return channel_map
 
 
@@ -310,26 +622,23 @@ def get_freq_data(kismet_file: Path):
     return freqcount
 
 
-def channel_count(kismet_file: Path):
-    MAX_24G_FREQ = 3000
-    freqcount = get_freq_data(kismet_file)
-    channel_map_5g = generate_5g_channels()
-    channel_map_24g = generate_24g_channels()
-    channel_map = {}
+def channel_count(kismet_file: Path) -> dict[tuple[str, int], int]:
+    """Count packets per Wi-Fi channel in a kismet file.
 
-    for channel in channel_map_5g.values():
-        for k,v in freqcount.items():
-            if channel["center"] == k:
-                channel_map[channel] = v
-            else:
-                channel_map[channel] = 0
-
-    for j in freqcount:
-        if j < MAX_24G_FREQ:
-            for channel in channel_map_24g:
-                if channel_map_24g[channel]["center"] == j:
-                    channel_map[channel] = freqcount[j]
-    return channel_map
+    See aya.spectrum for bytes, airtime and time buckets.
+
+    Args:
+        kismet_file (Path): The path to a kismetdb file
+
+    Returns:
+        dict[tuple[str, int], int]: (band, channel) to packet count, e.g. ("5GHz", 36). Channel numbers repeat across bands.
+
+    """
+    return {
+        (row.band, row.channel): row.packets
+        for row in survey_spectrum(kismet_file)
+        if row.channel is not None
+    }
 
 def report_new_and_missing(baseline_devs: list[KismetDevice], comp_devs: list[KismetDevice]):
 
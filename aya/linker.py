@@ -0,0 +1,254 @@
+"""Link randomized MAC addresses by 802.11 sequence number continuity.
+
+A client that rotates its MAC address usually keeps its sequence counter, so
+the first probe from a new address carries the number right after the last
+probe from the old one. SequenceLinker consumes (timestamp, MAC, sequence
+number) frames in capture order and, in a single pass, joins each newly seen
+address onto the open chain whose last sequence number it continues. Open
+chains are indexed by their last sequence number and dropped once they have
+been idle for a while, so memory is bounded by the number of addresses active
+inside that window rather than by the size of the capture.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from collections import OrderedDict
+from contextlib import closing
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from .classes import PseudoDevice, create_pseudo_device
+from .dot11 import DOT11_DLTS, seq_frame
+from .lib import DEFAULT_BATCH_SIZE
+
+SEQ_MODULO = 4096
+DEFAULT_MAX_GAP = 64
+DEFAULT_MAX_INTERVAL = 5.0
+DEFAULT_IDLE = 300.0
+
+
+class SeqFrame(NamedTuple):
+    """One frame's transmitter and sequence number."""
+
+    ts: float
+    mac: str
+    seq: int
+
+
+class _Chain:
+    """A run of addresses believed to be one device."""
+
+    __slots__ = ("aliases", "first_ts", "last_ts", "live")
+
+    def __init__(self, mac: str, ts: float):
+        self.aliases = [mac]
+        self.first_ts = ts
+        self.last_ts = ts
+        self.live = 0
+
+
+class _Tail:
+    """The latest frame seen from one address."""
+
+    __slots__ = ("mac", "seq", "ts", "chain", "open")
+
+    def __init__(self, mac: str, seq: int, ts: float, chain: _Chain):
+        self.mac = mac
+        self.seq = seq
+        self.ts = ts
+        self.chain = chain
+        self.open = True
+
+
+class SequenceLinker:
+    """Streaming sequence-number linker.
+
+    Args:
+        max_gap (int): Largest sequence number jump accepted between the old and new address
+        max_interval (float): Longest silence, in seconds, between the old address's last frame and the new address's first
+        idle (float): Seconds of silence after which an address is forgotten and its chain may be emitted
+        min_aliases (int): Only emit chains with at least this many addresses
+        source (Optional[Path]): Recorded in the emitted pseudo-devices' sources
+
+    """
+
+    def __init__(
+        self,
+        max_gap: int = DEFAULT_MAX_GAP,
+        max_interval: float = DEFAULT_MAX_INTERVAL,
+        idle: float = DEFAULT_IDLE,
+        min_aliases: int = 2,
+        source: Optional[Path] = None,
+    ):
+        self.max_gap = max_gap
+        self.max_interval = max_interval
+        self.idle = max(idle, max_interval)
+        self.min_aliases = min_aliases
+        self.source = source
+        # Tails in order of last activity, oldest first
+        self._tails: OrderedDict[str, _Tail] = OrderedDict()
+        # Open tails keyed by their last sequence number
+        self._by_seq: dict[int, dict[str, _Tail]] = {}
+
+    def __len__(self) -> int:
+        """Number of addresses currently held."""
+        return len(self._tails)
+
+    def _unindex(self, tail: _Tail) -> None:
+        bucket = self._by_seq.get(tail.seq)
+        if bucket is not None:
+            bucket.pop(tail.mac, None)
+            if not bucket:
+                del self._by_seq[tail.seq]
+
+    def _predecessor(self, ts: float, seq: int) -> Optional[_Tail]:
+        """The open tail this sequence number continues, if exactly one does at the smallest gap."""
+        for gap in range(1, self.max_gap + 1):
+            bucket = self._by_seq.get((seq - gap) % SEQ_MODULO)
+            if not bucket:
+                continue
+            candidates = [i for i in bucket.values() if 0 <= ts - i.ts <= self.max_interval]
+            if len(candidates) == 1:
+                return candidates[0]
+            if candidates:
+                # Ambiguous, don't guess
+                return None
+        return None
+
+    def _emit(self, chain: _Chain) -> Optional[PseudoDevice]:
+        if len(chain.aliases) < self.min_aliases:
+            return None
+        return create_pseudo_device(
+            f"seq:{chain.aliases[0]}",
+            aliases=list(chain.aliases),
+            first_time=datetime.fromtimestamp(chain.first_ts, UTC),
+            last_time=datetime.fromtimestamp(chain.last_ts, UTC),
+            sources=[self.source] if self.source is not None else [],
+        )
+
+    def _expire(self, now: float) -> list[PseudoDevice]:
+        finished = []
+        while self._tails:
+            tail = next(iter(self._tails.values()))
+            if now - tail.ts <= self.idle:
+                break
+            del self._tails[tail.mac]
+            self._unindex(tail)
+            tail.chain.live -= 1
+            if not tail.chain.live:
+                pseudo = self._emit(tail.chain)
+                if pseudo:
+                    finished.append(pseudo)
+        return finished
+
+    def feed(self, ts: float, mac: str, seq: int) -> list[PseudoDevice]:
+        """Add one frame.
+
+        Returns:
+            list[PseudoDevice]: Chains that went idle before this frame and are now complete
+        """
+        finished = self._expire(ts)
+        tail = self._tails.get(mac)
+        if tail is None:
+            previous = self._predecessor(ts, seq)
+            if previous is not None:
+                # The old address has handed over, it can't be continued twice
+                previous.open = False
+                self._unindex(previous)
+                chain = previous.chain
+                chain.aliases.append(mac)
+            else:
+                chain = _Chain(mac, ts)
+            chain.live += 1
+            tail = self._tails[mac] = _Tail(mac, seq, ts, chain)
+        else:
+            self._unindex(tail)
+            tail.seq = seq
+            tail.ts = ts
+            self._tails.move_to_end(mac)
+            chain = tail.chain
+        if ts > chain.last_ts:
+            chain.last_ts = ts
+        if tail.open:
+            self._by_seq.setdefault(seq, {})[mac] = tail
+        return finished
+
+    def flush(self) -> list[PseudoDevice]:
+        """Finish every chain still held, e.g. at the end of a capture."""
+        finished = []
+        seen = set()
+        for tail in self._tails.values():
+            if id(tail.chain) not in seen:
+                seen.add(id(tail.chain))
+                pseudo = self._emit(tail.chain)
+                if pseudo:
+                    finished.append(pseudo)
+        self._tails.clear()
+        self._by_seq.clear()
+        return finished
+
+
+def link_frames(frames: Iterable[SeqFrame], **kwargs) -> Iterator[PseudoDevice]:
+    """Link a time-ordered stream of frames, yielding pseudo-devices as their chains complete.
+
+    Args:
+        frames (Iterable[SeqFrame]): Anything with ts, mac and seq, in capture order
+        **kwargs: Passed to SequenceLinker
+
+    Returns:
+        Iterator[PseudoDevice]: Pseudo-devices identified as "seq:<first MAC>"
+    """
+    linker = SequenceLinker(**kwargs)
+    for frame in frames:
+        yield from linker.feed(frame.ts, frame.mac, frame.seq)
+    yield from linker.flush()
+
+
+def iter_packet_frames(
+    kismet_file: Path,
+    probes_only: bool = True,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[SeqFrame]:
+    """Stream transmitter/sequence number pairs from a kismetdb packets table.
+
+    Packets are read in timestamp order, ties broken by the order Kismet logged them.
+
+    Args:
+        kismet_file (Path): The path to a kismetdb file
+        probes_only (bool): Only use probe requests, the frames MAC randomizing clients send unassociated
+        batch_size (int): Number of rows fetched from the database per round trip
+
+    Returns:
+        Iterator[SeqFrame]: One frame per logged management or data packet
+    """
+    if not Path.exists(kismet_file):
+        msg = f"File not found: {kismet_file}"
+        raise FileNotFoundError(msg)
+    query = f"""
+        select ts_sec, ts_usec, dlt, packet from packets where dlt in ({', '.join(map(str, DOT11_DLTS))})
+        order by ts_sec, ts_usec, rowid
+    """
+    with closing(sqlite3.connect(kismet_file)) as con:
+        cur = con.execute(query)
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            for ts_sec, ts_usec, dlt, packet in rows:
+                found = seq_frame(packet, dlt, probes_only) if packet else None
+                if found is not None:
+                    yield SeqFrame(ts_sec + ts_usec / 1e6, *found)
+
+
+def link_survey(kismet_file: Path, probes_only: bool = True, **kwargs) -> list[PseudoDevice]:
+    """Link randomized MACs in one kismet file's packets table. Module level so it can run in a process pool."""
+    return list(link_frames(iter_packet_frames(kismet_file, probes_only), source=kismet_file, **kwargs))
+
+
+def link_capture(capture: Path, probes_only: bool = True, **kwargs) -> list[PseudoDevice]:
+    """Link randomized MACs in a pcap/pcapng file."""
+    from .pcap import iter_seq_frames
+
+    return list(link_frames(iter_seq_frames(capture, probes_only), source=capture, **kwargs))
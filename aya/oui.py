@@ -1,3 +1,23 @@
+"""OUI lists and a prefix index for classifying MACs by vendor.
+
+The module level lists are hand-picked vendor OUIs used by the finder tools.
+OUIIndex loads the IEEE MA-L/MA-M/MA-S registries into sorted integer
+prefix arrays and classifies a MAC against every vendor and tag with one
+bisect per prefix length.
+"""
+
+from __future__ import annotations
+
+import csv
+import re
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .lib import iter_device_rows
+
 GLinet = ['E4:95:6E', '94:83:C4']
 Espressif = ['C4-4F-33',
 'CC-50-E3',
@@ -31,4 +51,161 @@ Espressif = ['C4-4F-33',
 'BC-DD-C2',
 'DC-4F-22',
 'C8-2B-96']
-Cradlepoint = ['00:30:44', '00:E0:1C']
\ No newline at end of file
+Cradlepoint = ['00:30:44', '00:E0:1C']
+
+
+# Prefix lengths in bits, most specific first: MA-S, MA-M, MA-L
+PREFIX_BITS = (36, 28, 24)
+REGISTRY_BITS = {"MA-S": 36, "MA-M": 28, "MA-L": 24}
+NO_VENDOR = 0xFFFFFFFF
+
+
+def mac_to_int(mac: str) -> int:
+    """Turn a MAC in any common notation into its 48-bit integer value.
+
+    Raises:
+        ValueError: if mac doesn't contain exactly 12 hex digits
+
+    """
+    digits = re.sub(r"[^0-9a-fA-F]", "", mac)
+    if len(digits) != 12:
+        msg = f"Not a MAC address: {mac}"
+        raise ValueError(msg)
+    return int(digits, 16)
+
+
+def parse_prefix(prefix: str) -> tuple[int, int]:
+    """Turn an OUI/MA-M/MA-S assignment like 'C4-4F-33' into (bits, value).
+
+    Raises:
+        ValueError: if the prefix isn't 24, 28 or 36 bits of hex
+
+    """
+    digits = re.sub(r"[^0-9a-fA-F]", "", prefix)
+    bits = len(digits) * 4
+    if bits not in PREFIX_BITS:
+        msg = f"Unsupported OUI prefix: {prefix}"
+        raise ValueError(msg)
+    return bits, int(digits, 16)
+
+
+@dataclass(frozen=True)
+class OUIMatch:
+    vendor: str | None = None
+    tags: frozenset[str] = field(default_factory=frozenset)
+
+
+class OUIIndex:
+    """Sorted integer-prefix index of vendors and tags.
+
+    Prefixes are collected with add_vendor()/add_tag() and compiled on first
+    lookup into, per prefix length, a sorted array('Q') of prefixes with
+    parallel arrays of vendor ids and tag bitmasks.
+    """
+
+    def __init__(self):
+        self.vendors: list[str] = []
+        self.tags: list[str] = []
+        self._vendor_ids: dict[str, int] = {}
+        self._entries: dict[int, dict[int, list[int]]] = {bits: {} for bits in PREFIX_BITS}
+        self._compiled: dict[int, tuple[array, array, array]] | None = None
+
+    def __len__(self) -> int:
+        return sum(len(i) for i in self._entries.values())
+
+    def _entry(self, prefix: str) -> list[int]:
+        bits, value = parse_prefix(prefix)
+        self._compiled = None
+        return self._entries[bits].setdefault(value, [NO_VENDOR, 0])
+
+    def add_vendor(self, prefix: str, vendor: str) -> None:
+        """Assign a registry prefix to a vendor."""
+        if vendor not in self._vendor_ids:
+            self._vendor_ids[vendor] = len(self.vendors)
+            self.vendors.append(vendor)
+        self._entry(prefix)[0] = self._vendor_ids[vendor]
+
+    def add_tag(self, tag: str, prefixes: Iterable[str]) -> None:
+        """Label a set of prefixes, e.g. add_tag('Espressif', oui.Espressif)."""
+        if tag not in self.tags:
+            self.tags.append(tag)
+        bit = 1 << self.tags.index(tag)
+        for prefix in prefixes:
+            self._entry(prefix)[1] |= bit
+
+    def load_registry(self, path: Path) -> None:
+        """Load an IEEE registry CSV (oui.csv, mam.csv or oui36.csv from standards-oui.ieee.org).
+
+        Rows are Registry,Assignment,Organization Name,Organization Address.
+        """
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if row.get("Registry") in REGISTRY_BITS:
+                    self.add_vendor(row["Assignment"], row["Organization Name"].strip())
+
+    @classmethod
+    def from_registry(cls, *paths: Path, tags: dict[str, Iterable[str]] | None = None) -> OUIIndex:
+        """Build an index from IEEE registry files, tagged with the module's vendor lists by default."""
+        index = cls()
+        for path in paths:
+            index.load_registry(path)
+        for tag, prefixes in (DEFAULT_TAGS if tags is None else tags).items():
+            index.add_tag(tag, prefixes)
+        return index
+
+    def _compile(self) -> dict[int, tuple[array, array, array]]:
+        compiled = {}
+        for bits, entries in self._entries.items():
+            keys = sorted(entries)
+            compiled[bits] = (
+                array("Q", keys),
+                array("I", (entries[k][0] for k in keys)),
+                array("Q", (entries[k][1] for k in keys)),
+            )
+        self._compiled = compiled
+        return compiled
+
+    def lookup(self, mac: int) -> OUIMatch:
+        """Classify a 48-bit MAC integer; the vendor comes from the most specific prefix."""
+        compiled = self._compiled or self._compile()
+        vendor = None
+        tag_mask = 0
+        for bits in PREFIX_BITS:
+            keys, vendor_ids, masks = compiled[bits]
+            key = mac >> (48 - bits)
+            i = bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                if vendor is None and vendor_ids[i] != NO_VENDOR:
+                    vendor = self.vendors[vendor_ids[i]]
+                tag_mask |= masks[i]
+        tags = frozenset(tag for n, tag in enumerate(self.tags) if tag_mask >> n & 1)
+        return OUIMatch(vendor, tags)
+
+    def classify(self, mac: str) -> OUIMatch:
+        """Classify a MAC string, returning an empty match for anything unparseable."""
+        try:
+            return self.lookup(mac_to_int(mac))
+        except ValueError:
+            return OUIMatch()
+
+
+DEFAULT_TAGS = {"GLinet": GLinet, "Espressif": Espressif, "Cradlepoint": Cradlepoint}
+
+
+def classify_survey(
+    kismet_file: Path, index: OUIIndex, devtype: list[str] | None = None,
+) -> Iterator[tuple[str, OUIMatch]]:
+    """Classify every device in a kismetdb against all vendors and tags in one pass.
+
+    Only the devmac column is read.
+
+    Returns:
+        Iterator[tuple[str, OUIMatch]]: (MAC, match) for every device
+    """
+    for row in iter_device_rows(kismet_file, ("devmac",), devtype):
+        yield row.devmac, index.classify(row.devmac)
+
+
+def find_tag_matches(kismet_file: Path, index: OUIIndex, tag: str) -> list[str]:
+    """Get the MACs of every device in a kismetdb whose prefix carries tag."""
+    return [mac for mac, match in classify_survey(kismet_file, index) if tag in match.tags]
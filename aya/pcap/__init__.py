@@ -0,0 +1,16 @@
+"""aya-lib pcap/pcapng readers"""
+
+from .lib import (
+    get_devs,
+    iter_frames,
+    iter_packets,
+    iter_seq_frames,
+    parse_radiotap,
+)
+__all__ = (
+    "get_devs",
+    "iter_frames",
+    "iter_packets",
+    "iter_seq_frames",
+    "parse_radiotap",
+)
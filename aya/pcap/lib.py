@@ -1,12 +1,31 @@
+"""Native pcap/pcapng reader for 802.11 captures.
+
+The capture is memory-mapped and walked record by record with struct, and
+frames are decoded by aya.dot11, so no tshark process or per-packet dissector
+objects are involved. Radiotap (DLT 127) and bare 802.11 (DLT 105) captures
+are understood; records with other link types are skipped.
+"""
+
 from __future__ import annotations
 
-import binascii
+import mmap
+import struct
+from functools import lru_cache
 from pathlib import Path
-
-import pyshark
-from pyshark.packet.packet import Packet
+from typing import Iterator, NamedTuple, Optional
 
 from aya.classes import WiFiDevice
+from aya.dot11 import (
+    DLT_IEEE802_11,
+    DLT_IEEE802_11_RADIO,
+    SUBTYPE_BEACON,
+    SUBTYPE_PROBE_RESP,
+    TYPE_MANAGEMENT,
+    Dot11Frame,
+    parse_dot11,
+    radiotap_length,
+    seq_frame,
+)
 
 fc_types = {
     8: "DATA_TYPE",
@@ -25,49 +44,243 @@ fc_types = {
 }
 ap_types = ["BEACON_TYPE", "PROBE_RESP_TYPE"]
 
+PCAP_MAGIC = {
+    b"\xd4\xc3\xb2\xa1": ("<", 1e-6),
+    b"\xa1\xb2\xc3\xd4": (">", 1e-6),
+    b"\x4d\x3c\xb2\xa1": ("<", 1e-9),
+    b"\xa1\xb2\x3c\x4d": (">", 1e-9),
+}
+PCAPNG_SHB = 0x0A0D0D0A
+PCAPNG_BYTE_ORDER = 0x1A2B3C4D
+PCAPNG_IDB = 1
+PCAPNG_PB = 2
+PCAPNG_SPB = 3
+PCAPNG_EPB = 6
+IF_TSRESOL = 9
+
+# Radiotap fields before dBm antenna signal: (alignment, size) for present bits 0-4
+_RADIOTAP_FIELDS = ((8, 8), (1, 1), (1, 1), (2, 4), (1, 2))
+_RADIOTAP_CHANNEL = 3
+_RADIOTAP_SIGNAL = 5
+_RADIOTAP_FLAGS = 1
+_RADIOTAP_FLAG_FCS = 0x10
+_RADIOTAP_EXT = 1 << 31
+
+_le16 = struct.Struct("<H")
+_le32 = struct.Struct("<I")
+_s8 = struct.Struct("b")
+
+
+class CapturedPacket(NamedTuple):
+    """One record from a capture file."""
+
+    ts: float
+    dlt: int
+    data: bytes
+
+
+class PacketRecord(NamedTuple):
+    """A decoded 802.11 frame with its capture metadata."""
+
+    ts: float
+    frame: Dot11Frame
+    signal: Optional[int] = None
+    frequency: Optional[int] = None
+
+
+class RadiotapInfo(NamedTuple):
+    length: int
+    signal: Optional[int]
+    frequency: Optional[int]
+    fcs: bool
+
+
+@lru_cache(maxsize=256)
+def _radiotap_layout(present: tuple[int, ...]) -> tuple[Optional[int], Optional[int], Optional[int], int]:
+    """Offsets of the flags, channel and antenna signal fields for a chain of present bitmaps, plus the minimum length."""
+    offset = 4 + 4 * len(present)
+    first = present[0]
+    offsets: dict[int, int] = {}
+    for bit, (align, size) in enumerate(_RADIOTAP_FIELDS):
+        if first & (1 << bit):
+            offset += -offset % align
+            offsets[bit] = offset
+            offset += size
+    if first & (1 << _RADIOTAP_SIGNAL):
+        offsets[_RADIOTAP_SIGNAL] = offset
+        offset += 1
+    return offsets.get(_RADIOTAP_FLAGS), offsets.get(_RADIOTAP_CHANNEL), offsets.get(_RADIOTAP_SIGNAL), offset
+
 
-def hex_to_ascii(hex_string: str) -> str:
-    """Translate pyshark hex data into text."""
-    try:
-        return binascii.unhexlify(hex_string.replace(":", "")).decode("ascii", errors="ignore")
-    except binascii.Error:
-        return hex_string
+def parse_radiotap(data: bytes) -> RadiotapInfo:
+    """Read the header length, antenna signal (dBm), channel frequency (MHz) and FCS flag from a radiotap header."""
+    length = radiotap_length(data)
+    if length < 8 or len(data) < length:
+        return RadiotapInfo(length, None, None, False)
+    present = [_le32.unpack_from(data, 4)[0]]
+    # Fields only start after the last extended present bitmap
+    while present[-1] & _RADIOTAP_EXT and 8 + 4 * len(present) <= length:
+        present.append(_le32.unpack_from(data, 4 + 4 * len(present))[0])
+    flags, channel, signal, needed = _radiotap_layout(tuple(present))
+    if needed > length:
+        return RadiotapInfo(length, None, None, False)
+    return RadiotapInfo(
+        length,
+        _s8.unpack_from(data, signal)[0] if signal is not None else None,
+        _le16.unpack_from(data, channel)[0] if channel is not None else None,
+        flags is not None and bool(data[flags] & _RADIOTAP_FLAG_FCS),
+    )
 
 
-def get_ssid_from_packet(packet: Packet) -> str:
-    """Get SSID from packet if it exists."""
-    if hasattr(packet, "wlan.mgt"):
-        ssid = packet["wlan.mgt"].get("wlan_ssid", "")
-        return "" if ssid == "SSID: <MISSING>" else hex_to_ascii(ssid)
-    return ""
+def _iter_pcap(mm: mmap.mmap, endian: str, resolution: float) -> Iterator[CapturedPacket]:
+    header = struct.Struct(endian + "IIII")
+    dlt = struct.unpack_from(endian + "I", mm, 20)[0] & 0xFFFF
+    offset = 24
+    end = len(mm)
+    while offset + 16 <= end:
+        ts_sec, ts_frac, caplen, _ = header.unpack_from(mm, offset)
+        offset += 16
+        if offset + caplen > end:
+            break
+        yield CapturedPacket(ts_sec + ts_frac * resolution, dlt, mm[offset : offset + caplen])
+        offset += caplen
 
 
-def wifi_device_from_packet(packet: Packet) -> WiFiDevice:
-    """Create an Aya WiFi>Device from a pyshark Packets."""
+def _tsresol(mm: mmap.mmap, offset: int, end: int, endian: str) -> float:
+    """if_tsresol from an interface description block's options, defaulting to microseconds."""
+    while offset + 4 <= end:
+        code, length = struct.unpack_from(endian + "HH", mm, offset)
+        if code == 0:
+            break
+        if code == IF_TSRESOL and length >= 1:
+            value = mm[offset + 4]
+            return 2.0 ** -(value & 0x7F) if value & 0x80 else 10.0 ** -value
+        offset += 4 + length + (-length % 4)
+    return 1e-6
+
+
+def _iter_pcapng(mm: mmap.mmap) -> Iterator[CapturedPacket]:
+    end = len(mm)
+    offset = 0
+    endian = "<"
+    interfaces: list[tuple[int, int, float]] = []
+    while offset + 12 <= end:
+        block_type = struct.unpack_from(endian + "I", mm, offset)[0]
+        if block_type == PCAPNG_SHB:
+            endian = "<" if struct.unpack_from("<I", mm, offset + 8)[0] == PCAPNG_BYTE_ORDER else ">"
+            interfaces = []
+        block_len = struct.unpack_from(endian + "I", mm, offset + 4)[0]
+        if block_len < 12 or offset + block_len > end:
+            break
+        body = offset + 8
+        if block_type == PCAPNG_IDB:
+            dlt, _, snaplen = struct.unpack_from(endian + "HHI", mm, body)
+            interfaces.append((dlt, snaplen, _tsresol(mm, body + 8, offset + block_len - 4, endian)))
+        elif block_type in (PCAPNG_EPB, PCAPNG_PB):
+            if block_type == PCAPNG_EPB:
+                interface, ts_high, ts_low, caplen, _ = struct.unpack_from(endian + "IIIII", mm, body)
+            else:
+                interface, _, ts_high, ts_low, caplen, _ = struct.unpack_from(endian + "HHIIII", mm, body)
+            if interface < len(interfaces):
+                dlt, _, resolution = interfaces[interface]
+                data = body + 20
+                caplen = min(caplen, offset + block_len - 4 - data)
+                yield CapturedPacket(((ts_high << 32) | ts_low) * resolution, dlt, mm[data : data + caplen])
+        elif block_type == PCAPNG_SPB and interfaces:
+            dlt, snaplen, _ = interfaces[0]
+            origlen = struct.unpack_from(endian + "I", mm, body)[0]
+            caplen = min(origlen, snaplen or origlen, block_len - 16)
+            yield CapturedPacket(0.0, dlt, mm[body + 4 : body + 4 + caplen])
+        offset += block_len
+
+
+def iter_packets(filename: Path) -> Iterator[CapturedPacket]:
+    """Yield every record of a pcap or pcapng file.
+
+    Raises:
+        FileNotFoundError: if filename does not exist
+        ValueError: if the file isn't a pcap or pcapng capture
+    """
+    with open(filename, "rb") as f:
+        magic = f.read(4)
+        if not magic:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if magic in PCAP_MAGIC:
+                yield from _iter_pcap(mm, *PCAP_MAGIC[magic])
+            elif struct.unpack("<I", magic)[0] == PCAPNG_SHB:
+                yield from _iter_pcapng(mm)
+            else:
+                msg = f"Not a pcap or pcapng file: {filename}"
+                raise ValueError(msg)
+
+
+def iter_frames(filename: Path) -> Iterator[PacketRecord]:
+    """Yield the decoded 802.11 frames of a capture, skipping other link types and truncated frames."""
+    for packet in iter_packets(filename):
+        signal = frequency = None
+        data = packet.data
+        if packet.dlt == DLT_IEEE802_11_RADIO:
+            radiotap = parse_radiotap(data)
+            if radiotap.fcs:
+                data = data[:-4]
+            signal, frequency = radiotap.signal, radiotap.frequency
+            frame = parse_dot11(data, radiotap.length)
+        elif packet.dlt == DLT_IEEE802_11:
+            frame = parse_dot11(data)
+        else:
+            continue
+        if frame is not None:
+            yield PacketRecord(packet.ts, frame, signal, frequency)
+
+
+def iter_seq_frames(filename: Path, probes_only: bool = True):
+    """Yield aya.linker SeqFrames (timestamp, transmitter, sequence number) from a capture.
+
+    Only the frame control, transmitter and sequence control fields are read, so this is cheaper than iter_frames.
+    """
+    from aya.linker import SeqFrame
+
+    for packet in iter_packets(filename):
+        found = seq_frame(packet.data, packet.dlt, probes_only)
+        if found is not None:
+            yield SeqFrame(packet.ts, *found)
+
+
+def wifi_device_from_frame(frame: Dot11Frame) -> WiFiDevice:
+    """Create an Aya WiFiDevice from a decoded frame's transmitter."""
     dev_type = None
     ssid = None
-    if packet.wlan.fc_type_subtype.hex_value in fc_types:
-        fc_type = fc_types[packet.wlan.fc_type_subtype.hex_value]
-        if fc_type in ap_types:
-            dev_type = "Wi-Fi AP"
-            ssid = get_ssid_from_packet(packet)
-
-    return WiFiDevice(packet.wlan.ta, [], dev_type, ssid)
+    if frame.type == TYPE_MANAGEMENT and frame.subtype in (SUBTYPE_BEACON, SUBTYPE_PROBE_RESP):
+        dev_type = "Wi-Fi AP"
+        ssid = frame.ssid
+    return WiFiDevice(frame.ta, [], dev_type, ssid)
 
 
 def get_devs(filename: Path) -> list[WiFiDevice]:
-    """Generate a list of Aya WiFIDevices from a pcap."""
-    devs: dict[str, WiFiDevice] = {}
-    capture: pyshark.FileCapture = pyshark.FileCapture(filename)
-    for packet in capture:
-        if hasattr(packet.wlan, "ta"):
-            mac = packet.wlan.ta
-            if mac not in devs:
-                devs[mac] = wifi_device_from_packet(packet)
-                print(devs[mac])
-    return list(devs.values())
+    """Generate a list of Aya WiFiDevices from a pcap, one per transmitter address.
 
-
-devices = get_devs(Path("/home/sigsec/courtyardusm.pcap"))
-for i in devices:
-    print(i)
+    Frames are only fully decoded for new transmitters and for the first beacon of a transmitter
+    first seen another way; every other frame costs a frame control and address lookup.
+    """
+    devs: dict[bytes, WiFiDevice] = {}
+    for packet in iter_packets(filename):
+        data = packet.data
+        if packet.dlt == DLT_IEEE802_11_RADIO:
+            offset = radiotap_length(data)
+        elif packet.dlt == DLT_IEEE802_11:
+            offset = 0
+        else:
+            continue
+        if len(data) < offset + 16:
+            # Too short to have a transmitter address, e.g. ACK/CTS
+            continue
+        fc = data[offset]
+        ta = data[offset + 10 : offset + 16]
+        device = devs.get(ta)
+        if device is not None and (device.device_type is not None or fc_types.get(fc) not in ap_types):
+            continue
+        frame = parse_dot11(data, offset)
+        if frame is not None and frame.ta is not None:
+            devs[ta] = wifi_device_from_frame(frame)
+    return list(devs.values())
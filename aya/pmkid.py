@@ -0,0 +1,315 @@
+"""Harvest PMKIDs from kismet files into hashcat mode 22000 lines.
+
+Two sources are read. Devices whose JSON mentions wpa_handshake_list are
+picked out in SQL before any JSON is decoded. Optionally, the packets table is
+scanned for EAPOL message 1 frames carrying an RSN PMKID KDE, again narrowed
+in SQL to packets containing the EAPOL ethertype. Every PMKID found is
+recorded in a persistent store keyed by (pmkid, bssid, ssid), together with
+the signature of each survey already processed, so re-running over an archive
+only reads new or changed surveys and only emits hashes not seen before.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+import sqlite3
+from contextlib import closing
+from functools import partial
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+from .cache import DEFAULT_CACHE_DIR, file_signature
+from .dot11 import DLT_IEEE802_11_RADIO, DOT11_DLTS, TYPE_DATA, format_mac, radiotap_length
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_PATH = DEFAULT_CACHE_DIR / "pmkids.sqlite"
+
+SCHEMA = """
+create table if not exists surveys (
+    id integer primary key,
+    path text not null unique,
+    size int,
+    mtime_ns int,
+    packets int not null default 0
+);
+create table if not exists pmkids (
+    pmkid text not null,
+    bssid text not null,
+    ssid text not null,
+    client text not null,
+    survey int references surveys(id) on delete set null,
+    primary key (pmkid, bssid, ssid)
+);
+"""
+
+_LLC_EAPOL = b"\xaa\xaa\x03\x00\x00\x00\x88\x8e"
+_PMKID_KDE = b"\xdd\x14\x00\x0f\xac\x04"
+# Key information bits
+_KEY_PAIRWISE = 0x0008
+_KEY_INSTALL = 0x0040
+_KEY_ACK = 0x0080
+_KEY_MIC = 0x0100
+_EAPOL_KEY = 3
+# Offsets from the start of the EAPOL header
+_KEY_INFO = 5
+_KEY_DATA_LENGTH = 97
+_KEY_DATA = 99
+
+
+class PMKID(NamedTuple):
+    """A PMKID with the addresses and network name needed to crack it."""
+
+    pmkid: str
+    bssid: str
+    client: str
+    ssid: str
+
+    @property
+    def essid(self) -> bytes:
+        """The SSID's bytes as broadcast, which salt the PMK. Round-trips SSIDs that aren't valid UTF-8."""
+        return self.ssid.encode("utf-8", errors="surrogateescape")
+
+    def hashcat_line(self) -> str:
+        """Format as a hashcat mode 22000 PMKID line."""
+        return "*".join(
+            (
+                "WPA",
+                "01",
+                self.pmkid,
+                self.bssid.replace(":", "").lower(),
+                self.client.replace(":", "").lower(),
+                self.essid.hex(),
+                "",
+                "",
+                "",
+            )
+        )
+
+    @classmethod
+    def from_hashcat_line(cls, line: str) -> "PMKID":
+        """Parse a hashcat mode 22000 PMKID line.
+
+        Raises:
+            ValueError: if line isn't a WPA*01 line with a 16 byte PMKID
+        """
+        fields = line.strip().split("*")
+        if len(fields) < 6 or fields[0] != "WPA" or fields[1] != "01":
+            msg = f"Not a hashcat 22000 PMKID line: {line.strip()}"
+            raise ValueError(msg)
+        pmkid = normalize_pmkid(fields[2])
+        if pmkid is None or len(fields[3]) != 12 or len(fields[4]) != 12:
+            msg = f"Malformed PMKID line: {line.strip()}"
+            raise ValueError(msg)
+        bssid, client = (":".join(i[j : j + 2] for j in range(0, 12, 2)).upper() for i in fields[3:5])
+        # surrogateescape keeps the exact SSID bytes, so a non-UTF-8 SSID still salts the PMK correctly
+        return cls(pmkid, bssid, client, bytes.fromhex(fields[5]).decode("utf-8", errors="surrogateescape"))
+
+
+def normalize_pmkid(value) -> Optional[str]:
+    """Lower-case hex of a PMKID given as hex text or a list of byte values. None if it isn't 16 non-zero bytes."""
+    if isinstance(value, list):
+        try:
+            value = bytes(value).hex()
+        except (TypeError, ValueError):
+            return None
+    if not isinstance(value, str):
+        return None
+    digits = re.sub(r"[^0-9a-fA-F]", "", value).lower()
+    if len(digits) != 32 or not digits.strip("0"):
+        return None
+    return digits
+
+
+def _ssid(device: dict) -> str:
+    record = device.get("dot11.device", {}).get("dot11.device.last_beaconed_ssid_record", {})
+    return record.get("dot11.advertisedssid.ssid") or device.get("kismet.device.base.commonname") or ""
+
+
+def device_pmkids(kismet_file: Path) -> list[PMKID]:
+    """PMKIDs from the wpa_handshake_list of the devices in a kismet file.
+
+    Only rows whose device blob contains "wpa_handshake_list" are fetched and decoded.
+    """
+    found = []
+    query = "select devmac, device from devices where instr(device, 'wpa_handshake_list') > 0"
+    with closing(sqlite3.connect(kismet_file)) as con:
+        for devmac, blob in con.execute(query):
+            try:
+                device = json.loads(blob)
+            except (json.decoder.JSONDecodeError, UnicodeDecodeError) as e:
+                logger.warning("Error decoding %s in %s: %s", devmac, kismet_file, e)
+                continue
+            ssid = _ssid(device)
+            for handshake in device.get("dot11.device", {}).get("dot11.device.wpa_handshake_list", []):
+                pmkid = normalize_pmkid(handshake.get("dot11.eapol.rsn_pmkid"))
+                if pmkid is None:
+                    continue
+                src = str(handshake.get("dot11.eapol.src_mac") or "").upper()
+                dest = str(handshake.get("dot11.eapol.dest_mac") or "").upper()
+                client = dest if src == devmac.upper() or not src else src
+                if len(re.sub(r"[^0-9A-F]", "", client)) != 12:
+                    # hashcat rejects a 22000 line without the station MAC, so there's nothing to crack
+                    logger.info("Skipping PMKID of %s in %s with no client MAC", devmac, kismet_file)
+                    continue
+                found.append(PMKID(pmkid, devmac.upper(), client, ssid))
+    return found
+
+
+def eapol_pmkid(packet: bytes, dlt: int = DLT_IEEE802_11_RADIO) -> Optional[tuple[str, str, str]]:
+    """(pmkid, AP, client) from an EAPOL-Key message 1 frame carrying a PMKID KDE, else None."""
+    offset = radiotap_length(packet) if dlt == DLT_IEEE802_11_RADIO else 0
+    if len(packet) < offset + 24:
+        return None
+    fc, flags = packet[offset], packet[offset + 1]
+    if (fc >> 2) & 3 != TYPE_DATA:
+        return None
+    header = 24
+    if flags & 0x03 == 0x03:
+        # Four address frame
+        header += 6
+    if fc & 0x80:
+        # QoS data, plus an HT control field if the order bit is set
+        header += 2 + (4 if flags & 0x80 else 0)
+    llc = offset + header
+    if packet[llc : llc + 8] != _LLC_EAPOL:
+        return None
+    eapol = llc + 8
+    if len(packet) < eapol + _KEY_DATA or packet[eapol + 1] != _EAPOL_KEY:
+        return None
+    info = int.from_bytes(packet[eapol + _KEY_INFO : eapol + _KEY_INFO + 2], "big")
+    if info & (_KEY_PAIRWISE | _KEY_ACK | _KEY_MIC | _KEY_INSTALL) != _KEY_PAIRWISE | _KEY_ACK:
+        return None
+    length = int.from_bytes(packet[eapol + _KEY_DATA_LENGTH : eapol + _KEY_DATA], "big")
+    key_data = packet[eapol + _KEY_DATA : eapol + _KEY_DATA + length]
+    kde = key_data.find(_PMKID_KDE)
+    if kde < 0 or len(key_data) < kde + len(_PMKID_KDE) + 16:
+        return None
+    pmkid = normalize_pmkid(key_data[kde + len(_PMKID_KDE) : kde + len(_PMKID_KDE) + 16].hex())
+    if pmkid is None:
+        return None
+    # Message 1 goes from the AP (transmitter) to the client (receiver)
+    return pmkid, format_mac(packet[offset + 10 : offset + 16]), format_mac(packet[offset + 4 : offset + 10])
+
+
+def packet_pmkids(kismet_file: Path) -> list[PMKID]:
+    """PMKIDs from EAPOL frames in the packets table; SSIDs come from the AP's device record."""
+    eapol = []
+    query = (
+        f"select dlt, packet from packets where dlt in ({', '.join(map(str, DOT11_DLTS))}) "
+        "and instr(packet, x'888e') > 0"
+    )
+    with closing(sqlite3.connect(kismet_file)) as con:
+        for dlt, packet in con.execute(query):
+            found = eapol_pmkid(packet, dlt)
+            if found:
+                eapol.append(found)
+        bssids = sorted({ap for _, ap, _ in eapol})
+        names = {}
+        for i in range(0, len(bssids), 900):
+            chunk = bssids[i : i + 900]
+            names.update(
+                con.execute(
+                    "select devmac, json_extract(cast(device as text), '$.\"kismet.device.base.commonname\"') "
+                    f"from devices where json_valid(cast(device as text)) and devmac in ({', '.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+            )
+    return [PMKID(pmkid, ap, client, names.get(ap) or "") for pmkid, ap, client in eapol]
+
+
+def survey_pmkids(kismet_file: Path, packets: bool = False) -> tuple[tuple[str, int, int], list[PMKID]]:
+    """Every PMKID in a kismet file along with the file signature it was read at."""
+    signature = file_signature(kismet_file)
+    found = device_pmkids(kismet_file)
+    if packets:
+        found += packet_pmkids(kismet_file)
+    return signature, found
+
+
+class PMKIDStore:
+    """Persistent seen-set of PMKIDs and processed surveys.
+
+    Args:
+        path (Path): Store database file, created if missing
+
+    """
+
+    def __init__(self, path: Path = DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.con = sqlite3.connect(self.path)
+        self.con.execute("pragma foreign_keys = on")
+        self.con.executescript(SCHEMA)
+        columns = {row[1] for row in self.con.execute("pragma table_info(surveys)")}
+        if "packets" not in columns:
+            # Stores from before the scan mode was recorded; their surveys count as device-only harvests
+            with self.con:
+                self.con.execute("alter table surveys add column packets int not null default 0")
+
+    def close(self) -> None:
+        self.con.close()
+
+    def __enter__(self) -> PMKIDStore:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.con.execute("select count(*) from pmkids").fetchone()[0]
+
+    def is_current(self, path: Path, packets: bool = False) -> bool:
+        """Whether path was already harvested, with its packets table too if packets, and is unchanged since."""
+        resolved, size, mtime_ns = file_signature(path)
+        row = self.con.execute("select size, mtime_ns, packets from surveys where path = ?", (resolved,)).fetchone()
+        return row is not None and row[:2] == (size, mtime_ns) and (row[2] or not packets)
+
+    def add(self, signature: tuple[str, int, int], pmkids: Iterable[PMKID], packets: bool = False) -> list[PMKID]:
+        """Record a harvested survey, and whether its packets table was scanned, returning the PMKIDs not already in the store."""
+        resolved, size, mtime_ns = signature
+        new = []
+        with self.con:
+            self.con.execute("delete from surveys where path = ?", (resolved,))
+            survey_id = self.con.execute(
+                "insert into surveys (path, size, mtime_ns, packets) values (?, ?, ?, ?)",
+                (resolved, size, mtime_ns, int(packets)),
+            ).lastrowid
+            for pmkid in pmkids:
+                inserted = self.con.execute(
+                    "insert or ignore into pmkids (pmkid, bssid, ssid, client, survey) values (?, ?, ?, ?, ?)",
+                    (pmkid.pmkid, pmkid.bssid, pmkid.ssid, pmkid.client, survey_id),
+                ).rowcount
+                if inserted:
+                    new.append(pmkid)
+        return new
+
+    def harvest(
+        self,
+        surveys: Iterable[Path],
+        packets: bool = False,
+        workers: Optional[int] = None,
+    ) -> Iterator[PMKID]:
+        """Harvest new or changed surveys in a process pool, yielding each PMKID the first time it's seen.
+
+        Args:
+            surveys (Iterable[Path]): kismetdb files, e.g. every project of an archive
+            packets (bool): Also scan the packets table for EAPOL frames
+            workers (Optional[int]): Process pool size, see map_files
+
+        Returns:
+            Iterator[PMKID]: New PMKIDs, as each survey finishes
+        """
+        from .Project import map_files
+
+        stale = [survey for survey in sorted(surveys) if not self.is_current(survey, packets)]
+        logger.info("%s surveys to harvest", len(stale))
+        for survey, (signature, pmkids) in map_files(stale, partial(survey_pmkids, packets=packets), workers):
+            logger.info("Harvested %s (%s PMKIDs)", survey, len(pmkids))
+            yield from self.add(signature, pmkids, packets)
+
+    def pmkids(self) -> list[PMKID]:
+        """Every PMKID in the store."""
+        return [PMKID(*row) for row in self.con.execute("select pmkid, bssid, client, ssid from pmkids order by bssid")]
@@ -0,0 +1,252 @@
+"""Indexes and fingerprints over the SSIDs devices have probed for.
+
+ProbeIndex keeps an inverted index from SSID to the devices that probed for
+it, stored both as integer bitmaps and as member lists. Dominance checks
+("is this device's probe set contained in another's") intersect the bitmaps
+of the device's own SSIDs, and overlap queries only touch the devices that
+share at least one SSID, so neither compares every pair of devices.
+
+Clients that randomize their MAC address usually keep probing for the same
+saved networks, so cluster_by_fingerprint buckets devices by a hash of their
+probe set and folds each bucket into a PseudoDevice carrying the MAC aliases.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections import Counter
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Iterable, Iterator, Mapping, NamedTuple, Optional
+
+from .classes import PseudoDevice, create_pseudo_device
+
+STA_TYPES = ["Wi-Fi Client", "Wi-Fi Device"]
+
+
+def probe_fingerprint(ssids: Iterable[str]) -> str:
+    """Hash a probe set independent of order and duplicates.
+
+    Unlike KismetDevice.probehash this doesn't depend on Python's per-process string
+    hashing, so fingerprints can be compared between worker processes and runs.
+
+    Args:
+        ssids (Iterable[str]): Probed SSIDs
+
+    Returns:
+        str: 16 hex digits, or an empty string if there are no SSIDs
+    """
+    ssids = sorted({i for i in ssids if i})
+    if not ssids:
+        return ""
+    return hashlib.blake2b("\0".join(ssids).encode(), digest_size=8).hexdigest()
+
+
+def _bits(mask: int) -> Iterator[int]:
+    """Yield the positions of the set bits in mask."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class ProbeIndex:
+    """Inverted SSID index over devices' probed-SSID sets.
+
+    Args:
+        probe_sets (Optional Mapping[str, Iterable[str]]): Device key (usually MAC) to probed SSIDs
+
+    """
+
+    def __init__(self, probe_sets: Mapping[str, Iterable[str]] | None = None):
+        self.keys: list[str] = []
+        self.sets: list[frozenset[str]] = []
+        self._ids: dict[str, int] = {}
+        self._bitmaps: dict[str, int] = {}
+        self._members: dict[str, list[int]] = {}
+        for key, ssids in (probe_sets or {}).items():
+            self.add(key, ssids)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._ids
+
+    def add(self, key: str, ssids: Iterable[str]) -> None:
+        """Index a device's probes, merging with anything already indexed under key."""
+        ssids = frozenset(i for i in ssids if i)
+        if key in self._ids:
+            device = self._ids[key]
+            new = ssids - self.sets[device]
+            self.sets[device] |= ssids
+        else:
+            device = len(self.keys)
+            self._ids[key] = device
+            self.keys.append(key)
+            self.sets.append(ssids)
+            new = ssids
+        for ssid in new:
+            self._bitmaps[ssid] = self._bitmaps.get(ssid, 0) | 1 << device
+            self._members.setdefault(ssid, []).append(device)
+
+    def probers(self, ssid: str) -> list[str]:
+        """Keys of every device that probed for ssid."""
+        return [self.keys[i] for i in self._members.get(ssid, [])]
+
+    def _supersets(self, device: int) -> int:
+        """Bitmap of the other devices whose probe set contains this device's."""
+        ssids = self.sets[device]
+        if not ssids:
+            return ((1 << len(self.keys)) - 1) & ~(1 << device)
+        mask = -1
+        # Intersect the rarest SSIDs first so the mask shrinks quickly
+        for ssid in sorted(ssids, key=lambda i: len(self._members[i])):
+            mask &= self._bitmaps[ssid]
+            if mask == 1 << device:
+                break
+        return mask & ~(1 << device)
+
+    def dominated(self, key: str) -> bool:
+        """Whether another device probed for everything key did.
+
+        Of several devices with identical probe sets, all but the last added count as dominated,
+        so exactly one of them survives prune().
+        """
+        device = self._ids[key]
+        size = len(self.sets[device])
+        for other in _bits(self._supersets(device)):
+            if len(self.sets[other]) > size or other > device:
+                return True
+        return False
+
+    def prune(self) -> list[str]:
+        """Keys of the devices whose probe sets aren't dominated by another device's."""
+        return [key for key in self.keys if not self.dominated(key)]
+
+    def sharing(self, key: str, k: int = 1) -> dict[str, int]:
+        """Other devices sharing at least k probed SSIDs with key, mapped to the number shared."""
+        device = self._ids[key]
+        counts = Counter(other for ssid in self.sets[device] for other in self._members[ssid])
+        counts.pop(device, None)
+        return {self.keys[other]: n for other, n in counts.most_common() if n >= k}
+
+
+class ProbeSighting(NamedTuple):
+    """The probe-related fields of one STA in one survey."""
+
+    mac: str
+    fingerprint: str
+    ssids: tuple[str, ...]
+    first_time: Optional[datetime]
+    last_time: Optional[datetime]
+    source: Optional[Path] = None
+
+
+def survey_probe_sightings(kismet_file: Path, min_ssids: int = 1) -> list[ProbeSighting]:
+    """Fingerprint every STA in a kismet file that probed for at least min_ssids SSIDs."""
+    from .lib import iter_devs
+
+    sightings = []
+    for device in iter_devs(kismet_file, STA_TYPES, lazy=True):
+        ssids = tuple(sorted({i for i in device.probedSSIDs if i}))
+        if ssids and len(ssids) >= min_ssids:
+            sightings.append(
+                ProbeSighting(device.mac, probe_fingerprint(ssids), ssids, device.first_time, device.last_time, kismet_file)
+            )
+    return sightings
+
+
+class _Cluster:
+    """Running totals for one fingerprint bucket."""
+
+    __slots__ = ("ssids", "aliases", "sources", "first_time", "last_time")
+
+    def __init__(self, ssids: tuple[str, ...]):
+        self.ssids = ssids
+        self.aliases: dict[str, None] = {}
+        self.sources: dict[Path, None] = {}
+        self.first_time = None
+        self.last_time = None
+
+    def add(self, sighting: ProbeSighting) -> None:
+        self.aliases[sighting.mac] = None
+        if sighting.source is not None:
+            self.sources[sighting.source] = None
+        if sighting.first_time is not None and (self.first_time is None or sighting.first_time < self.first_time):
+            self.first_time = sighting.first_time
+        if sighting.last_time is not None and (self.last_time is None or sighting.last_time > self.last_time):
+            self.last_time = sighting.last_time
+
+
+def _as_sighting(device) -> ProbeSighting:
+    if isinstance(device, ProbeSighting):
+        return device
+    ssids = tuple(sorted({i for i in device.probedSSIDs if i}))
+    return ProbeSighting(device.mac, probe_fingerprint(ssids), ssids, device.first_time, device.last_time)
+
+
+def cluster_by_fingerprint(devices: Iterable, min_ssids: int = 2, min_aliases: int = 2) -> list[PseudoDevice]:
+    """Group devices with identical probe sets into pseudo-devices.
+
+    Each device is hashed into its bucket once, so this is linear in the number of devices.
+
+    Args:
+        devices (Iterable): KismetDevices, DeviceRecords or ProbeSightings, from any number of surveys
+        min_ssids (int): Ignore devices that probed for fewer SSIDs than this; a single popular SSID is shared by chance
+        min_aliases (int): Only return pseudo-devices seen under at least this many MACs
+
+    Returns:
+        list[PseudoDevice]: Pseudo-devices identified as "probe:<fingerprint>", most aliases first
+    """
+    clusters: dict[str, _Cluster] = {}
+    for device in devices:
+        sighting = _as_sighting(device)
+        if not sighting.fingerprint or len(sighting.ssids) < min_ssids:
+            continue
+        cluster = clusters.get(sighting.fingerprint)
+        if cluster is None:
+            cluster = clusters[sighting.fingerprint] = _Cluster(sighting.ssids)
+        cluster.add(sighting)
+
+    found = [
+        create_pseudo_device(
+            f"probe:{fingerprint}",
+            aliases=list(cluster.aliases),
+            probedSSIDs=list(cluster.ssids),
+            first_time=cluster.first_time,
+            last_time=cluster.last_time,
+            sources=list(cluster.sources),
+        )
+        for fingerprint, cluster in clusters.items()
+        if len(cluster.aliases) >= min_aliases
+    ]
+    return sorted(found, key=lambda i: len(i.aliases), reverse=True)
+
+
+def cluster_surveys(
+    surveys: Iterable[Path],
+    min_ssids: int = 2,
+    min_aliases: int = 2,
+    workers: Optional[int] = None,
+) -> list[PseudoDevice]:
+    """Fingerprint STAs across many kismet files in a process pool and cluster them.
+
+    Workers only send back ProbeSightings, never device JSON.
+
+    Args:
+        surveys (Iterable[Path]): kismetdb files, e.g. from several projects
+        min_ssids (int): See cluster_by_fingerprint
+        min_aliases (int): See cluster_by_fingerprint
+        workers (Optional[int]): Process pool size, see map_files
+
+    Returns:
+        list[PseudoDevice]: See cluster_by_fingerprint
+    """
+    from .Project import map_files
+
+    results = map_files(sorted(surveys), partial(survey_probe_sightings, min_ssids=min_ssids), workers)
+    return cluster_by_fingerprint(
+        (sighting for _, sightings in results for sighting in sightings), min_ssids, min_aliases
+    )
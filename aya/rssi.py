@@ -0,0 +1,137 @@
+"""Per-device signal statistics from the kismetdb packets table, compared across surveys.
+
+The statistics are computed inside SQLite with one GROUP BY sourcemac pass
+(percentiles use a window function over each device's packets), so Python
+only sees one row per device. Surveys are then joined on MAC through a dict.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from contextlib import closing
+from functools import partial
+from pathlib import Path
+from typing import NamedTuple, Optional, Sequence
+
+from .lib import _normalize_devtype
+
+DEFAULT_PERCENTILES = (0.5, 0.9)
+NULL_MAC = "00:00:00:00:00:00"
+
+
+class SignalStats(NamedTuple):
+    """Signal summary of one device in one survey, in dBm."""
+
+    mac: str
+    packets: int
+    min: int
+    max: int
+    mean: float
+    percentiles: tuple[int, ...]
+
+
+def _rank(p: float) -> str:
+    """SQL for the nearest-rank position of percentile p among n values, i.e. max(1, ceil(p * n))."""
+    return f"max(1, cast({p!r} * n as int) + ({p!r} * n > cast({p!r} * n as int)))"
+
+
+def signal_stats(
+    kismet_file: Path,
+    devtype: list[str] | None = None,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    min_packets: int = 1,
+) -> dict[str, SignalStats]:
+    """Summarize the signal of every device's packets in a kismet file.
+
+    Args:
+        kismet_file (Path): The path to a kismetdb file
+        devtype (Optional list[str]): Only devices of these kismetdb types, e.g. ["Wi-Fi AP"]. All devices if not provided.
+        percentiles (Sequence[float]): Nearest-rank percentiles to compute, as fractions
+        min_packets (int): Leave out devices with fewer packets carrying a signal
+
+    Returns:
+        dict[str, SignalStats]: Keyed by MAC
+
+    Raises:
+        FileNotFoundError: if kismet_file does not exist
+        sqlite3.OperationalError: If the query fails for whatever reason
+    """
+    if not Path.exists(kismet_file):
+        msg = f"File not found: {kismet_file}"
+        raise FileNotFoundError(msg)
+    if any(not 0 < p <= 1 for p in percentiles):
+        msg = f"Percentiles must be in (0, 1]: {percentiles}"
+        raise ValueError(msg)
+    devtype = _normalize_devtype(devtype)
+    # Kismet logs 0 when a packet had no signal
+    where = "signal != 0 and sourcemac != ?"
+    params: list = [NULL_MAC]
+    if devtype:
+        where += f" and sourcemac in (select devmac from devices where type in ({', '.join('?' * len(devtype))}))"
+        params += devtype
+    columns = ", ".join(f"max(case when rn <= {_rank(p)} then signal end)" for p in percentiles)
+    query = f"""
+        select mac, n, min(signal), max(signal), avg(signal){', ' if columns else ''}{columns}
+        from (
+            select sourcemac as mac, signal,
+                row_number() over (partition by sourcemac order by signal) as rn,
+                count(*) over (partition by sourcemac) as n
+            from packets where {where}
+        )
+        group by mac
+        having n >= ?
+    """
+    params.append(min_packets)
+    with closing(sqlite3.connect(kismet_file)) as con:
+        return {
+            row[0]: SignalStats(row[0], row[1], row[2], row[3], row[4], tuple(row[5:]))
+            for row in con.execute(query, params)
+        }
+
+
+def compare_surveys(
+    surveys: Sequence[Path],
+    devtype: list[str] | None = None,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+    min_packets: int = 1,
+    min_surveys: int = 2,
+    workers: Optional[int] = None,
+) -> dict[str, list[Optional[SignalStats]]]:
+    """Signal statistics for every device across several surveys.
+
+    Each survey is aggregated in its own worker process, then the results are joined on MAC.
+
+    Args:
+        surveys (Sequence[Path]): kismetdb files to compare
+        devtype (Optional list[str]): See signal_stats
+        percentiles (Sequence[float]): See signal_stats
+        min_packets (int): See signal_stats
+        min_surveys (int): Only keep devices seen in at least this many of the surveys
+        workers (Optional[int]): Process pool size, see map_files
+
+    Returns:
+        dict[str, list[Optional[SignalStats]]]: MAC to one entry per survey, in the order given, None where it wasn't seen
+    """
+    from .Project import map_files
+
+    position = {survey: i for i, survey in enumerate(surveys)}
+    read = partial(signal_stats, devtype=devtype, percentiles=percentiles, min_packets=min_packets)
+    joined: dict[str, list[Optional[SignalStats]]] = {}
+    for survey, stats in map_files(list(surveys), read, workers):
+        column = position[survey]
+        for mac, row in stats.items():
+            entry = joined.get(mac)
+            if entry is None:
+                entry = joined[mac] = [None] * len(surveys)
+            entry[column] = row
+    return {
+        mac: entry
+        for mac, entry in sorted(joined.items())
+        if sum(i is not None for i in entry) >= min_surveys
+    }
+
+
+def strongest(entry: Sequence[Optional[SignalStats]], percentile: int = 0) -> Optional[int]:
+    """Index of the survey where a device was strongest, by the given percentile column."""
+    seen = [(row.percentiles[percentile] if row.percentiles else row.max, i) for i, row in enumerate(entry) if row]
+    return max(seen)[1] if seen else None
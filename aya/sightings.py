@@ -0,0 +1,188 @@
+"""Persistent index of which devices were seen in which projects.
+
+Answering "which devices showed up at more than one project" used to mean
+re-reading every survey of every project. SightingIndex ingests each survey
+once into a SQLite table of (mac, project, survey, first_time, last_time)
+rows, re-ingesting a survey only when its size or mtime changes, and answers
+cross-project questions with indexed queries.
+"""
+
+from __future__ import annotations
+
+import logging
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence
+
+from .cache import DEFAULT_CACHE_DIR, file_signature
+from .lib import iter_device_rows
+from .Project import map_files
+from .wigle import columns_from_csv
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INDEX_PATH = DEFAULT_CACHE_DIR / "sightings.sqlite"
+
+SCHEMA = """
+create table if not exists surveys (
+    id integer primary key,
+    project text not null,
+    path text not null unique,
+    size int,
+    mtime_ns int
+);
+create table if not exists sightings (
+    mac text not null,
+    project text not null,
+    survey int not null references surveys(id) on delete cascade,
+    first_time real,
+    last_time real
+);
+create index if not exists sightings_mac on sightings (mac, project);
+create index if not exists sightings_project on sightings (project, mac);
+create index if not exists sightings_survey on sightings (survey);
+"""
+
+
+def _kismet_sightings(path: Path) -> Iterator[tuple[str, float, float]]:
+    for row in iter_device_rows(path, ("devmac", "first_time", "last_time")):
+        yield row.devmac.upper(), row.first_time, row.last_time
+
+
+def _wigle_sightings(path: Path) -> Iterator[tuple[str, float | None, float | None]]:
+    for chunk in columns_from_csv(path):
+        for mac, first_seen in zip(chunk["mac"], chunk["first_seen"]):
+            seen = first_seen.timestamp()
+            yield mac.upper(), seen, seen
+
+
+def _read_sightings(path: Path) -> tuple[tuple[str, int, int], list[tuple]]:
+    """Read a survey's (mac, first_time, last_time) rows along with the file signature they match."""
+    signature = file_signature(path)
+    if path.suffix == ".csv":
+        return signature, list(_wigle_sightings(path))
+    return signature, list(_kismet_sightings(path))
+
+
+class SightingIndex:
+    """SQLite-backed (mac, project, survey) sightings table.
+
+    Args:
+        path (Path): Index database file, created if missing
+
+    """
+
+    def __init__(self, path: Path = DEFAULT_INDEX_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.con = sqlite3.connect(self.path)
+        self.con.execute("pragma foreign_keys = on")
+        self.con.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.con.close()
+
+    def __enter__(self) -> SightingIndex:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def is_current(self, project: str, path: Path) -> bool:
+        """Whether path is already indexed under project and unchanged since."""
+        resolved, size, mtime_ns = file_signature(path)
+        row = self.con.execute(
+            "select project, size, mtime_ns from surveys where path = ?", (resolved,)
+        ).fetchone()
+        return row == (project, size, mtime_ns)
+
+    def _store(self, project: str, signature: tuple[str, int, int], sightings: Iterable[tuple]) -> None:
+        resolved, size, mtime_ns = signature
+        logger.info("Indexing %s for project %s", resolved, project)
+        with self.con:
+            self.con.execute("delete from surveys where path = ?", (resolved,))
+            survey_id = self.con.execute(
+                "insert into surveys (project, path, size, mtime_ns) values (?, ?, ?, ?)",
+                (project, resolved, size, mtime_ns),
+            ).lastrowid
+            self.con.executemany(
+                "insert into sightings values (?, ?, ?, ?, ?)",
+                ((mac, project, survey_id, first, last) for mac, first, last in sightings),
+            )
+
+    def ingest_survey(self, project: str, path: Path) -> bool:
+        """Index one kismetdb or Wigle CSV file, skipping it if unchanged since the last ingest.
+
+        Returns:
+            bool: True if the file was (re)indexed
+
+        """
+        if self.is_current(project, path):
+            return False
+        self._store(project, *_read_sightings(Path(path)))
+        return True
+
+    def ingest_project(self, project_path: Path, name: str | None = None, workers: int | None = None) -> int:
+        """Index every new or changed kismetdb and Wigle CSV file under a project folder.
+
+        Files are read in parallel with map_files; writes happen in this process.
+
+        Returns:
+            int: Number of files that were new or changed
+
+        """
+        name = name or project_path.name
+        files = sorted([*project_path.glob("**/*.kismet"), *project_path.glob("**/*.csv")])
+        stale = [file for file in files if not self.is_current(name, file)]
+        for _, (signature, sightings) in map_files(stale, _read_sightings, workers):
+            self._store(name, signature, sightings)
+        return len(stale)
+
+    def projects(self) -> list[str]:
+        return [i for (i,) in self.con.execute("select distinct project from surveys order by project")]
+
+    def common_devices(
+        self, min_projects: int = 2, projects: Sequence[str] | None = None,
+    ) -> dict[str, list[str]]:
+        """Find devices seen in at least min_projects distinct projects.
+
+        Args:
+            min_projects (int): Minimum number of projects a MAC must appear in
+            projects (Optional Sequence[str]): Only consider these projects
+
+        Returns:
+            dict[str, list[str]]: MAC to the projects it was seen in, ordered by first sighting
+
+        """
+        where, params = "", []
+        if projects:
+            where = f"where project in ({', '.join('?' * len(projects))})"
+            params = list(projects)
+        query = f"""
+            with scoped as (select * from sightings {where})
+            select mac, project from scoped
+            where mac in (
+                select mac from scoped group by mac having count(distinct project) >= ?
+            )
+            group by mac, project
+            order by mac, min(first_time)
+        """
+        common: dict[str, list[str]] = {}
+        for mac, project in self.con.execute(query, [*params, min_projects]):
+            common.setdefault(mac, []).append(project)
+        return common
+
+    def sightings(self, macs: Iterable[str]) -> list[tuple[str, str, str, float, float]]:
+        """Return (mac, project, survey path, first_time, last_time) rows for the given MACs."""
+        macs = [i.upper() for i in macs]
+        rows = []
+        for i in range(0, len(macs), 900):
+            chunk = macs[i : i + 900]
+            rows += self.con.execute(
+                "select s.mac, s.project, v.path, s.first_time, s.last_time "
+                "from sightings s join surveys v on v.id = s.survey "
+                f"where s.mac in ({', '.join('?' * len(chunk))}) order by s.mac, s.first_time",
+                chunk,
+            ).fetchall()
+        return rows
@@ -0,0 +1,133 @@
+"""Spectrum utilization per channel, band and time bucket from the kismetdb packets table.
+
+SQLite collapses the packets table with one GROUP BY over (frequency, time
+bucket), so Python only sees one row per distinct frequency per bucket.
+Those rows are mapped to channels through a frequency lookup table built
+once at import, and summed into per-bucket arrays indexed by channel slot.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from array import array
+from contextlib import closing
+from functools import partial
+from pathlib import Path
+from typing import NamedTuple, Optional, Sequence
+
+
+def _build_channels() -> tuple[tuple[str, int, int], ...]:
+    """(band, channel, center MHz) for every 2.4, 5 and 6 GHz Wi-Fi channel number."""
+    channels = [("2.4GHz", n, 2407 + 5 * n) for n in range(1, 14)]
+    channels.append(("2.4GHz", 14, 2484))
+    channels += [("5GHz", n, 5000 + 5 * n) for n in range(1, 178)]
+    channels.append(("6GHz", 2, 5935))
+    channels += [("6GHz", n, 5950 + 5 * n) for n in range(1, 234)]
+    return tuple(channels)
+
+
+CHANNELS = _build_channels()
+# Slot for frequencies that aren't a channel center, reported with no band or channel
+UNKNOWN_SLOT = len(CHANNELS)
+MAX_MHZ = max(center for _, _, center in CHANNELS)
+_SLOTS = array("i", [UNKNOWN_SLOT]) * (MAX_MHZ + 1)
+for _slot, (_, _, _center) in enumerate(CHANNELS):
+    _SLOTS[_center] = _slot
+
+
+class SpectrumRow(NamedTuple):
+    """Traffic on one channel of one survey during one time bucket."""
+
+    survey: str
+    start: Optional[int]
+    band: Optional[str]
+    channel: Optional[int]
+    frequency: Optional[int]
+    packets: int
+    bytes: int
+    airtime: float
+
+
+def channel_slot(mhz: int) -> int:
+    """Index into CHANNELS of the channel centered on mhz, or UNKNOWN_SLOT."""
+    return _SLOTS[mhz] if 0 <= mhz <= MAX_MHZ else UNKNOWN_SLOT
+
+
+def channel_for(mhz: int) -> Optional[tuple[str, int]]:
+    """(band, channel) of the channel centered on mhz, None if it isn't a Wi-Fi channel center."""
+    slot = channel_slot(mhz)
+    return CHANNELS[slot][:2] if slot != UNKNOWN_SLOT else None
+
+
+def survey_spectrum(kismet_file: Path, bucket: Optional[int] = None) -> list[SpectrumRow]:
+    """Sum packets, bytes and airtime per channel and time bucket in a kismet file.
+
+    Airtime is estimated as packet bits over the logged data rate, without PHY preamble
+    overhead; packets with no data rate count toward packets and bytes only.
+
+    Args:
+        kismet_file (Path): The path to a kismetdb file
+        bucket (Optional int): Bucket width in seconds. The whole survey is one bucket if not provided.
+
+    Returns:
+        list[SpectrumRow]: One row per channel with traffic per bucket, ordered by bucket then frequency.
+            Bucket start is epoch seconds, None without buckets. Airtime is in seconds.
+
+    Raises:
+        FileNotFoundError: if kismet_file does not exist
+        sqlite3.OperationalError: If the query fails for whatever reason
+    """
+    if not Path.exists(kismet_file):
+        msg = f"File not found: {kismet_file}"
+        raise FileNotFoundError(msg)
+    start = "(ts_sec / ?) * ?" if bucket else "null"
+    query = f"""
+        select cast(frequency / 1000 as int) as mhz, {start} as start, count(*), sum(packet_len),
+            sum(case when datarate > 0 then packet_len * 8.0 / datarate else 0 end)
+        from packets where frequency > 0
+        group by mhz, start
+    """
+    slots = UNKNOWN_SLOT + 1
+    totals: dict[Optional[int], tuple[array, array, array]] = {}
+    with closing(sqlite3.connect(kismet_file)) as con:
+        for mhz, begin, packets, size, airtime in con.execute(query, (bucket, bucket) if bucket else ()):
+            sums = totals.get(begin)
+            if sums is None:
+                sums = totals[begin] = (array("q", [0]) * slots, array("q", [0]) * slots, array("d", [0]) * slots)
+            slot = channel_slot(mhz)
+            sums[0][slot] += packets
+            sums[1][slot] += size or 0
+            # packet_len is bytes and datarate Mbps, so the sum is in microseconds
+            sums[2][slot] += airtime / 1e6
+    survey = str(kismet_file)
+    rows = []
+    for begin in sorted(totals, key=lambda i: (i is None, i)):
+        counts, sizes, airtimes = totals[begin]
+        for slot in range(slots):
+            if counts[slot]:
+                band, channel, center = CHANNELS[slot] if slot != UNKNOWN_SLOT else (None, None, None)
+                rows.append(SpectrumRow(survey, begin, band, channel, center, counts[slot], sizes[slot], airtimes[slot]))
+    return rows
+
+
+def spectrum_usage(
+    surveys: Sequence[Path],
+    bucket: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> list[SpectrumRow]:
+    """Spectrum utilization of several surveys as one tidy table.
+
+    Each survey is aggregated in its own worker process with a single packets table scan.
+
+    Args:
+        surveys (Sequence[Path]): kismetdb files to aggregate
+        bucket (Optional int): See survey_spectrum
+        workers (Optional[int]): Process pool size, see map_files
+
+    Returns:
+        list[SpectrumRow]: Every survey's rows, in the order the surveys were given
+    """
+    from .Project import map_files
+
+    results = dict(map_files(list(surveys), partial(survey_spectrum, bucket=bucket), workers))
+    return [row for survey in surveys for row in results[survey]]
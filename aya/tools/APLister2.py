@@ -6,6 +6,8 @@ from aya import KismetDevice
 
 parser = argparse.ArgumentParser()
 parser.add_argument("survey", nargs="+", default=["test"])
+parser.add_argument("-w", "--workers", type=int, default=None, help="Parallel survey parsers (default: CPU count)")
+parser.add_argument("--no-cache", action="store_true", help="Re-parse every device instead of using the on-disk cache")
 args = parser.parse_args()
 
 basepath: Path = aya.get_basepath()
@@ -21,10 +23,12 @@ def ProcessProject(project_folder: Path):
         dict: Contains all APs with SSID, Clients, and MAC
     """
     project_dict = {}
-    files = project_folder.glob("**/*.kismet")
-    for file in files:
-        location: str = Path(file).parent.name
-        file_APs: list[KismetDevice] = aya.get_access_points(file)
+    surveys = aya.iter_surveys(
+        project_folder, ["Wi-Fi AP", "Wi-Fi Bridged"], args.workers, cache=not args.no_cache
+    )
+    for survey in surveys:
+        location: str = survey.path.parent.name
+        file_APs: list[KismetDevice] = survey.devices
         file_dict = {}
         if file_APs:
             file_dict = process_file(file_APs)
@@ -66,7 +70,7 @@ def process_file(kismet_devices: list[KismetDevice]) -> dict:
     file_dict = {}
     for device in kismet_devices:
         mac = device.mac
-        ssid = device.json["kismet.device.base.commonname"]
+        ssid = device.name
         file_dict[ssid] = {"Clients": [], "Surveys": [], "MACs": []}
         clients = device.clients
         if clients:
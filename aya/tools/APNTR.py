@@ -2,17 +2,22 @@ import argparse
 import aya
 from pathlib import Path
 from aya import KismetDevice
+from aya.probes import ProbeIndex
 
 parser = argparse.ArgumentParser()
 parser.add_argument("survey", nargs="+", default="")
+parser.add_argument("-w", "--workers", type=int, default=None, help="Parallel survey parsers (default: CPU count)")
+parser.add_argument("--no-cache", action="store_true", help="Re-parse every device instead of using the on-disk cache")
+parser.add_argument("--shared", type=int, default=0, help="Also list other STAs sharing at least this many probed SSIDs")
 args = parser.parse_args()
 
 
 def get_aps(folder: Path):
     clients: dict = {}
-    for file in folder.glob("**/*.kismet"):
-        devs = aya.get_stas(file)
-        merge_project_dicts(clients, devs)
+    for survey in aya.iter_surveys(
+        folder, ["Wi-Fi Client", "Wi-Fi Device"], args.workers, cache=not args.no_cache
+    ):
+        merge_project_dicts(clients, survey.devices)
     return clients
 
 
@@ -45,10 +50,14 @@ def main():
             else:
                 clients[device] = project_clients[device]
 
+    index = ProbeIndex(clients) if args.shared else None
     for client in clients:
         if len(clients[client]) > 1:
             print(client + ":")
             print(clients[client])
+            if index:
+                for other, shared in index.sharing(client, args.shared).items():
+                    print(f"\tshares {shared} SSIDs with {other}")
 
 
 if __name__ == "__main__":
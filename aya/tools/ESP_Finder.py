@@ -1,18 +1,20 @@
 import argparse
+from functools import partial
 from pathlib import Path
 import aya
 
 parser = argparse.ArgumentParser()
 parser.add_argument("survey", nargs='+')
+parser.add_argument('-w', '--workers', type=int, default=None, help='Parallel survey parsers (default: CPU count)')
 args = parser.parse_args()
 
 basepath = aya.get_basepath()
 
 def FindDevices(Folder: Path):
-    for i in Folder.glob('**/*.kismet'):
-        devices: list[aya.KismetDevice] = aya.find_oui_matches(i, aya.oui.Espressif)
-        for i in devices:
-            print(i.mac)
+    finder = partial(aya.oui.find_tag_matches, index=aya.oui.OUIIndex.from_registry(), tag='Espressif')
+    for _, macs in aya.map_surveys(Folder, finder, args.workers):
+        for mac in macs:
+            print(mac)
 
 
 def main():
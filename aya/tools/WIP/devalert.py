@@ -1,66 +1,48 @@
-from multiprocessing import connection
-import time
+import argparse
+import asyncio
+import logging
+from pathlib import Path
 import aya
-import kismet_rest
-from aya import KismetDevice
+from aya.aiorest import AsyncConnection
+from aya.alert import AlertEngine, JSONLinesSink, SOIIndex, print_sink
 
+parser = argparse.ArgumentParser(description='Alert on devices of interest seen by a live Kismet server')
+parser.add_argument('soi', nargs='*', type=Path, default=[Path('./mock_data/all-dev.txt'), Path('./mock_data/all-soi.txt')],
+                    help='Target files: MACs, or oui:/ssid:/probe: entries, one per line')
+parser.add_argument('--config', type=Path, default=Path('./mock_data/test_connection.json'), help='Kismet connection config')
+parser.add_argument('--ttl', type=float, default=300, help='Seconds before the same alert is raised again')
+parser.add_argument('--interval', type=float, default=2, help='Seconds between polls')
+parser.add_argument('--since', type=float, default=-120, help='Start with devices seen this many seconds ago (negative) or since an epoch time')
+parser.add_argument('--jsonl', type=Path, default=None, help='Also append alerts to this JSON lines file')
 
-def load_macs_from_file(filename):
-    with open(filename) as f:
-        devs = set(f.readlines())
-    return devs
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
-def activeDevices(devices, fromTime) -> list[KismetDevice]:
-    fromTime = int(time.time() - float(fromTime))
-    active_devices = devices.all(ts=fromTime)
-    macs = [(aya.KismetDevice.from_json(i)) for i in active_devices]
-    return macs
+def load_index(files: list[Path]) -> SOIIndex:
+    index = SOIIndex()
+    for file in files:
+        index.load(file)
+    return index
 
 
-def connect_to_devices():
+async def run(args):
     try:
-        connection_parameters = aya.rest.connection_from_config(
-            "./mock_data/test_connection.json"
-        )
-        user = connection_parameters["username"]
-        passw = connection_parameters["password"]
-        host = connection_parameters["address"]
-        port = connection_parameters["port"]
-        uri = f"http://{host}:{port}"
+        connection_parameters = aya.rest.connection_from_config(args.config)
     except FileNotFoundError:
-        user = "username"
-        passw = "password"
-    return kismet_rest.Devices(uri, username=user, password=passw)
+        connection_parameters = {}
+    sinks = [print_sink] + ([JSONLinesSink(args.jsonl)] if args.jsonl else [])
+    engine = AlertEngine(load_index(args.soi), sinks, ttl=args.ttl)
+    async with AsyncConnection(**connection_parameters) as connection:
+        await engine.run(connection, since=args.since, interval=args.interval)
 
 
 def main():
-    devices = connect_to_devices()
-    devfile = "./mock_data/all-dev.txt"
-    soifile = "./mock_data/all-soi.txt"
-
-    target = load_macs_from_file(devfile)
-    targetmac = [i.split(" ")[0][:-1] for i in target]
-    soi = load_macs_from_file(soifile)
-
-    while True:
-        soialert = []
-        alert = []
-        active = activeDevices(devices, 120)
-        alert = [device for device in active if device.mac in targetmac]
-        soialert = [device for device in active if device.mac in soi]
-        if alert:
-            for i in alert:
-                print(i.identifier)
-            print("")
-        if soialert:
-            for i in soialert:
-                print(i.identifier)
-            print("")
-        if not soialert and not alert:
-            print("...")
-        time.sleep(2)
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
 
 
-if __name__ == "__main__":
+if __name__ == '__main__':
     main()
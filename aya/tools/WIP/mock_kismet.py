@@ -0,0 +1,129 @@
+"""Minimal stand-in for a Kismet server's device REST endpoints, for exercising aya's live tools offline.
+
+Serves the devices of a kismetdb (or synthetic ones) and marks a few of them as
+freshly seen every second, so pollers see a steady stream of deltas.
+    python -m aya.tools.WIP.mock_kismet survey.kismet --port 2501 --churn 50
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs
+
+import aya
+
+parser = argparse.ArgumentParser()
+parser.add_argument('kismetdb', nargs='?', type=Path, help='Serve the devices from this file instead of synthetic ones')
+parser.add_argument('--port', type=int, default=2501)
+parser.add_argument('--churn', type=int, default=20, help='Devices marked as seen each second')
+parser.add_argument('--synthetic', type=int, default=1000, help='Number of synthetic devices without a kismetdb')
+
+LAST_TIME = 'kismet.device.base.last_time'
+lock = threading.Lock()
+devices: dict[str, dict] = {}
+
+
+def load_devices(args) -> None:
+    now = int(time.time())
+    if args.kismetdb:
+        for row in aya.iter_device_rows(args.kismetdb, ('devkey', 'devmac', 'type', 'first_time', 'last_time', 'device')):
+            record = json.loads(row.device)
+            record['kismet.device.base.key'] = row.devkey
+            record.setdefault('kismet.device.base.macaddr', row.devmac)
+            record.setdefault('kismet.device.base.type', row.type)
+            record.setdefault('kismet.device.base.first_time', row.first_time)
+            record.setdefault(LAST_TIME, row.last_time)
+            devices[row.devkey] = record
+        return
+    for i in range(args.synthetic):
+        mac = ':'.join(f'{b:02X}' for b in random.randbytes(6))
+        devices[f'key{i}'] = {
+            'kismet.device.base.key': f'key{i}',
+            'kismet.device.base.macaddr': mac,
+            'kismet.device.base.type': 'Wi-Fi Client',
+            'kismet.device.base.commonname': mac,
+            'kismet.device.base.first_time': now,
+            LAST_TIME: now,
+            'kismet.device.base.signal': {'kismet.common.signal.last_signal': -random.randint(30, 90)},
+            'dot11.device': {'dot11.device.probed_ssid_map': [{'dot11.probedssid.ssid': f'net{random.randrange(50)}'}]},
+        }
+
+
+def churn(rate: int) -> None:
+    while True:
+        time.sleep(1)
+        now = int(time.time())
+        with lock:
+            for key in random.sample(list(devices), min(rate, len(devices))):
+                devices[key][LAST_TIME] = now
+
+
+def simplify(record: dict, fields: list) -> dict:
+    """Apply Kismet's field simplification: each path's value keyed by its last component, or its rename."""
+    simplified = {}
+    for field in fields:
+        path, rename = (field[0], field[1]) if isinstance(field, list) else (field, None)
+        value = record
+        for part in path.split('/'):
+            value = value.get(part) if isinstance(value, dict) else None
+        simplified[rename or path.split('/')[-1]] = value
+    return simplified
+
+
+class Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, body) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_command(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode()) if length else {}
+        return json.loads(form['json'][0]) if 'json' in form else {}
+
+    def route(self, command: dict) -> None:
+        fields = command.get('fields')
+        if self.path == '/system/status.json':
+            return self.reply({'kismet.system.timestamp.sec': int(time.time()), 'kismet.system.devices.count': len(devices)})
+        since = re.fullmatch(r'/devices/last-time/(-?\d+)/devices.json', self.path)
+        if since:
+            ts = int(since.group(1))
+            ts = time.time() + ts if ts < 0 else ts
+            with lock:
+                found = [i for i in devices.values() if i[LAST_TIME] >= ts]
+        elif self.path == '/devices/multimac/devices.json':
+            macs = set(command.get('devices', []))
+            with lock:
+                found = [i for i in devices.values() if i['kismet.device.base.macaddr'] in macs]
+        else:
+            self.send_error(404)
+            return None
+        self.reply([simplify(i, fields) for i in found] if fields else found)
+
+    def do_GET(self):
+        self.route({})
+
+    def do_POST(self):
+        self.route(self.read_command())
+
+
+def main():
+    args = parser.parse_args()
+    load_devices(args)
+    threading.Thread(target=churn, args=(args.churn,), daemon=True).start()
+    print(f'Serving {len(devices)} devices on port {args.port}')
+    ThreadingHTTPServer(('127.0.0.1', args.port), Handler).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
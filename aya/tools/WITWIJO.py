@@ -1,10 +1,12 @@
 import argparse
 import logging
 import aya
-from aya import KismetDevice, WigleDevice
+from aya.sightings import DEFAULT_INDEX_PATH, SightingIndex
 from pathlib import Path
 parser = argparse.ArgumentParser()
 parser.add_argument('projects', nargs='+')
+parser.add_argument('-w', '--workers', type=int, default=None, help='Parallel survey parsers (default: CPU count)')
+parser.add_argument('--index', type=Path, default=DEFAULT_INDEX_PATH, help='Sightings index database, reused across runs')
 args = parser.parse_args()
 basepath = aya.get_basepath()
 
@@ -14,28 +16,6 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def append_to_mac_dict(project: str, macs: list[str], mac_dict):
-    for mac in macs:
-        if mac not in mac_dict:
-            mac_dict[mac] = [project]
-        elif project not in mac_dict[mac]:
-            mac_dict[mac].append(project)
-    return mac_dict
-
-def parse_project(path: Path) -> list[str]:
-    project_devices = set()
-    for kismet in path.glob('**/*.kismet'):
-        logger.info('Parsing Kismet file %s', kismet)
-        kismet_devices: list[KismetDevice] = aya.get_devs(kismet)
-        macs: list[str] = [i.mac for i in kismet_devices]
-        project_devices.update(macs)
-    for wigle in path.glob('**/*.csv'):
-        logger.info('Parsing Wigle file %s', wigle)
-        wigle_devices: list[WigleDevice] = aya.wigle.devices_from_csv(wigle)
-        macs: list[str] = [i.mac for i in wigle_devices]
-        project_devices.update(macs)
-    return list(project_devices)
-
 def main():
     projects: list[Path] = [basepath / project for project in args.projects]
     try: 
@@ -44,13 +24,12 @@ def main():
         logger.fatal(e)
         raise e
     logger.info('Using directories: %s', [str(i) for i in projects])
-    mac_dictionary = {}
-    for project in projects:
-        MACList = parse_project(project)
-        project_name = project.name
-        mac_dictionary = append_to_mac_dict(project_name, MACList, mac_dictionary)
-        logger.info('Finished project %s', project)
-    common_devices = [i for i in mac_dictionary if len(mac_dictionary[i]) > 1]
+    with SightingIndex(args.index) as index:
+        for project in projects:
+            updated = index.ingest_project(project, workers=args.workers)
+            logger.info('Finished project %s (%s new or changed files)', project, updated)
+        mac_dictionary = index.common_devices(2, [project.name for project in projects])
+    common_devices = list(mac_dictionary)
     logger.info('%s common devices found', len(common_devices))
 
     for device in common_devices:
@@ -0,0 +1,61 @@
+import argparse
+import json
+import logging
+from pathlib import Path
+from aya.cracker import DEFAULT_PORT, DEFAULT_QUEUE_PATH, CrackerService, HashCrackerDevice, serve
+
+parser = argparse.ArgumentParser(description='Local PMKID cracking queue')
+commands = parser.add_subparsers(dest='command', required=True)
+
+serve_parser = commands.add_parser('serve', help='Run the queue, workers and HTTP API')
+serve_parser.add_argument('--queue', type=Path, default=DEFAULT_QUEUE_PATH, help='Job queue database')
+serve_parser.add_argument('-w', '--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+serve_parser.add_argument('--chunk-size', type=int, default=1000, help='Words per worker task')
+serve_parser.add_argument('--max-queue', type=int, default=1000, help='Refuse submissions beyond this many queued jobs')
+serve_parser.add_argument('--address', default='127.0.0.1')
+serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+
+submit_parser = commands.add_parser('submit', help='Queue every hashcat 22000 line in a file')
+submit_parser.add_argument('hashes', type=Path, help='File of hashcat 22000 lines, e.g. from hash_grabber')
+submit_parser.add_argument('wordlist', type=Path, help='Wordlist path on the server')
+submit_parser.add_argument('--endpoint', default=f'http://127.0.0.1:{DEFAULT_PORT}')
+
+status_parser = commands.add_parser('status', help='Show a job, or the queue metrics without a job')
+status_parser.add_argument('job', type=int, nargs='?')
+status_parser.add_argument('token', nargs='?')
+status_parser.add_argument('--endpoint', default=f'http://127.0.0.1:{DEFAULT_PORT}')
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def main():
+    args = parser.parse_args()
+    if args.command == 'serve':
+        service = CrackerService(args.queue, args.workers, args.chunk_size, args.max_queue)
+        service.start()
+        server = serve(service, args.address, args.port)
+        logging.info('Listening on %s:%s with %s workers', args.address, args.port, service.workers)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            service.stop()
+    elif args.command == 'submit':
+        cracker = HashCrackerDevice(args.endpoint)
+        with open(args.hashes) as f:
+            for line in f:
+                if line.strip():
+                    job_id, token = cracker.submit(line.strip(), args.wordlist.resolve())
+                    print(job_id, token, line.strip(), sep='\t')
+    else:
+        cracker = HashCrackerDevice(args.endpoint)
+        if args.job is None:
+            print(json.dumps(cracker.metrics(), indent=2))
+        else:
+            print(json.dumps(cracker.result(args.job, args.token or ''), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,39 +1,58 @@
 import argparse
 from pathlib import Path
 import aya
+from aya.alert import SOIIndex
 
 parser = argparse.ArgumentParser()
-parser.add_argument("survey", nargs='+')
+parser.add_argument("survey", nargs='*')
+parser.add_argument('--soi', type=Path, default=Path('/home/sigsec/soi.txt'), help='File with one MAC of interest per line')
+parser.add_argument('-w', '--workers', type=int, default=None, help='Parallel file searchers (default: CPU count)')
+parser.add_argument('-f', '--follow', type=Path, default=None, help='Tail a kismetdb Kismet is still writing and print hits as they appear')
+parser.add_argument('-i', '--interval', type=float, default=aya.lib.DEFAULT_FOLLOW_INTERVAL, help='Seconds between polls with --follow')
 args = parser.parse_args()
+if not args.survey and not args.follow:
+    parser.error('give at least one survey or --follow')
 
 basepath = aya.get_basepath()
 
-def find_kismet_devices(Folder: Path, soi_file: Path):
-    for file in Folder.glob('**/*.kismet'):
-        with open(soi_file) as f:
-            soi_list = f.readlines()
-        soi_list = [f'{i.upper().strip()}' for i in soi_list if i.strip()]
-        soi_devices = [aya.classes.WiFiDevice(i) for i in soi_list]
-        devices = aya.find_soi(file, soi_devices)
+def print_header():
+    print('\t'.join(('target', 'mac', 'matched_on', 'first_seen', 'last_seen', 'signal', 'file')))
 
-        if devices:
-            for i in devices:
-                print(i.mac, file)
+def print_hits(hits: list[aya.classes.SearchHit]):
+    for hit in hits:
+        print('\t'.join(str(i) for i in (
+            hit.target, hit.mac, hit.matched_on, hit.first_seen, hit.last_seen, hit.signal, hit.file,
+        )), flush=True)
 
-def find_wigle_devices(folder: Path, soi_file: Path):
-    for file in folder.glob('**/*.csv'):
-        devices: list[aya.WigleDevice] = aya.wigle.find_soi(file, soi_file)
-        
-        for device in devices:
-            print(device.identifier, file)
+def follow_survey(kismet_file: Path):
+    index = SOIIndex.from_file(args.soi)
+    reported = set()
+    print_header()
+    for device in aya.follow(kismet_file, interval=args.interval):
+        for target, matched_on in index.match(device):
+            # Print each match once, not every time the device's last_time moves
+            if (device.mac, target, matched_on) in reported:
+                continue
+            reported.add((device.mac, target, matched_on))
+            print_hits([aya.classes.SearchHit(
+                target, kismet_file, device.mac, matched_on, device.first_time, device.last_time, device.max_signal,
+            )])
 
 def main():
-    soi = Path('/home/sigsec/soi.txt')
+    if args.follow:
+        try:
+            follow_survey(args.follow)
+        except KeyboardInterrupt:
+            pass
+        return
+    targets = aya.load_soi(args.soi)
     projects: list[Path] = [basepath / project for project in args.survey]
     aya.check_filepaths(projects)
+    hits = []
     for project in projects:
-        find_kismet_devices(project, soi)
-        find_wigle_devices(project, soi)
+        hits += aya.search_project(project, targets, args.workers)
+    print_header()
+    print_hits(hits)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,33 +1,41 @@
 import argparse
+import logging
+import sys
 from pathlib import Path
 import aya
+from aya.pmkid import DEFAULT_STORE_PATH, PMKIDStore
 
-parser = argparse.ArgumentParser()
+parser = argparse.ArgumentParser(description="Write hashcat 22000 lines for the PMKIDs in a group of projects")
 parser.add_argument("project", nargs="+")
+parser.add_argument("-w", "--workers", type=int, default=None, help="Parallel survey parsers (default: CPU count)")
+parser.add_argument("--packets", action="store_true", help="Also scan the packets table for EAPOL frames")
+parser.add_argument("--store", type=Path, default=DEFAULT_STORE_PATH, help="PMKID store; surveys and hashes already in it are skipped")
+parser.add_argument("--all", action="store_true", help="Print every PMKID in the store, not just new ones")
+parser.add_argument("-o", "--output", type=Path, default=None, help="Append lines to this file instead of printing them")
 args = parser.parse_args()
 
 basepath = aya.get_basepath()
 
-
-def process_project(project_folder: Path):
-    project_hashes = {}
-    for kismet_file in project_folder.glob("**/*.kismet"):
-        APs = aya.get_access_points(kismet_file)
-        for AP in APs:
-            handshake = AP.hashes
-            if handshake:
-                project_hashes[AP.mac] = {"Hash": handshake, "SSID": AP.name}
-    return project_hashes
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 
 def main():
-    hashes = {}
     projects: list[Path] = [basepath / project for project in args.project]
     aya.check_filepaths(projects)
-    for project in projects:
-        hashes.update(process_project(project))
-    for mac in sorted(hashes):
-        print(mac, hashes[mac])
+    surveys = [survey for project in projects for survey in project.glob("**/*.kismet")]
+    out = open(args.output, "a") if args.output else sys.stdout
+    try:
+        with PMKIDStore(args.store) as store:
+            for pmkid in store.harvest(surveys, args.packets, args.workers):
+                if not args.all:
+                    out.write(pmkid.hashcat_line() + "\n")
+                    out.flush()
+            if args.all:
+                for pmkid in store.pmkids():
+                    out.write(pmkid.hashcat_line() + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
 
 
 if __name__ == "__main__":
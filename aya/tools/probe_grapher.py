@@ -3,9 +3,11 @@ import networkx as nx
 import argparse
 import aya
 from aya import KismetDevice
+from aya.probes import ProbeIndex
 
 parser = argparse.ArgumentParser()
 parser.add_argument("projects", nargs="+", default="folder1")
+parser.add_argument("-w", "--workers", type=int, default=None, help="Parallel survey parsers (default: CPU count)")
 args = parser.parse_args()
 
 
@@ -14,9 +16,8 @@ def ProcessProject(project: Path):
     Iterate through project to grab all probe requests made by all devices
     """
     project_dictionary = {}
-    for kismet_file in project.glob("**/*.kismet"):
-        devices = aya.get_stas(kismet_file)
-        for device in devices:
+    for survey in aya.iter_surveys(project, ["Wi-Fi Client", "Wi-Fi Device"], args.workers):
+        for device in survey.devices:
             if device.mac not in project_dictionary:
                 project_dictionary[device.mac] = device.probedSSIDs
             else:
@@ -40,18 +41,8 @@ def isProbeSubset(mac1, mac2):
 
 def PruneDict(file_dictionary):
     """Remove keys whose value list is a subset of another's in the same dict."""
-    keys = list(file_dictionary.keys())
-    sets = {k: set(v) for k, v in file_dictionary.items()}
-    to_remove = set()
-
-    keys.sort(key=lambda k: len(sets[k]))
-
-    for i in range(len(keys)):
-        for j in range(i + 1, len(keys)):  
-            if sets[keys[i]].issubset(sets[keys[j]]):
-                to_remove.add(keys[i])
- 
-    return {k: v for k, v in file_dictionary.items() if k not in to_remove}
+    keep = set(ProbeIndex(file_dictionary).prune())
+    return {k: v for k, v in file_dictionary.items() if k in keep}
 
 
 def GenerateGraph(overall_dict):
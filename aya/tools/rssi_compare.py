@@ -0,0 +1,47 @@
+import argparse
+from pathlib import Path
+import aya
+from aya.rssi import compare_surveys, strongest
+
+parser = argparse.ArgumentParser(description='Compare the signal of devices seen in several surveys, e.g. inside vs outside a building')
+parser.add_argument('surveys', nargs='+', help='kismetdb files, or project folders whose files are each treated as a survey')
+parser.add_argument('--devtype', action='append', default=None, help='kismetdb device type to compare, may be repeated (default: Wi-Fi AP)')
+parser.add_argument('--min-packets', type=int, default=5, help='Ignore devices with fewer packets than this in a survey')
+parser.add_argument('--min-surveys', type=int, default=2, help='Only show devices seen in at least this many surveys')
+parser.add_argument('-w', '--workers', type=int, default=None, help='Parallel survey readers (default: CPU count)')
+args = parser.parse_args()
+
+basepath = aya.get_basepath()
+
+
+def expand(paths: list[str]) -> list[Path]:
+    surveys = []
+    for path in paths:
+        path = Path(path) if Path(path).exists() else basepath / path
+        aya.check_filepaths([path])
+        surveys += sorted(path.glob('**/*.kismet')) if path.is_dir() else [path]
+    return surveys
+
+
+def fmt(row) -> str:
+    if row is None:
+        return '-'
+    return f'{row.percentiles[0]}/{row.max} ({row.packets})'
+
+
+def main():
+    surveys = expand(args.surveys)
+    results = compare_surveys(
+        surveys,
+        devtype=args.devtype or ['Wi-Fi AP'],
+        min_packets=args.min_packets,
+        min_surveys=args.min_surveys,
+        workers=args.workers,
+    )
+    print('\t'.join(['mac', *(str(i) for i in surveys), 'strongest']))
+    for mac, entry in results.items():
+        print('\t'.join([mac, *(fmt(row) for row in entry), surveys[strongest(entry)].name]))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,9 +2,19 @@
 
 from .lib import (
     find_soi,
+    match_macs,
     devices_from_csv,
+    iter_devices_from_csv,
+    iter_macs_from_csv,
+    iter_rows_from_csv,
+    columns_from_csv,
 )
 __all__ = (
     "find_soi",
+    "match_macs",
     "devices_from_csv",
+    "iter_devices_from_csv",
+    "iter_macs_from_csv",
+    "iter_rows_from_csv",
+    "columns_from_csv",
 )
@@ -1,18 +1,80 @@
 import csv
+from array import array
+from datetime import datetime
+from itertools import islice
+
+# Wigle CSVs start with a WigleWifi-x.y pre-header line and then the column header
+HEADER_LINES = 2
+DEFAULT_CHUNK_SIZE = 50000
 
 
 def find_soi(file, soi_file):
     with open(soi_file) as f:
         soi_list = f.readlines()
-    soi_list = [i.lower().strip() for i in soi_list if i.strip()]
-    devices = devices_from_csv(file)
-    hits = [i for i in devices if i.identifier in soi_list]
-    return hits
+    return match_macs(file, [i for i in soi_list if i.strip()])
 
-def devices_from_csv(file):
+def match_macs(file, macs):
+    """Get every row of a wiglecsv whose MAC is in macs, compared case- and separator-insensitively.
+
+    Rows are filtered on the MAC column first, so only hits become WigleDevices.
+    """
+    from ..classes import WigleDevice
+    from ..lib import normalize_mac
+    targets = {normalize_mac(i) for i in macs}
+    # Parse the whole stream, since a quoted SSID can span lines
+    return [WigleDevice.from_record(row) for row in iter_rows_from_csv(file) if normalize_mac(row[0]) in targets]
+
+def _iter_lines(file):
+    with open(file, newline="") as f:
+        for _ in range(HEADER_LINES):
+            f.readline()
+        yield from f
+
+def iter_rows_from_csv(file):
+    """Stream the raw rows of a wiglecsv, skipping the headers."""
+    for row in csv.reader(_iter_lines(file)):
+        if row:
+            yield row
+
+def iter_devices_from_csv(file):
+    """Stream WigleDevices from a wiglecsv one row at a time."""
     from ..classes import WigleDevice
-    with open(file) as f:
-        raw_file = f.readlines()[2:]
-    csvdata = csv.reader(raw_file)
-    devices = [WigleDevice.from_record(i) for i in csvdata]
-    return devices
\ No newline at end of file
+    for row in iter_rows_from_csv(file):
+        yield WigleDevice.from_record(row)
+
+def iter_macs_from_csv(file):
+    """Stream just the MAC column of a wiglecsv without building any objects."""
+    for row in iter_rows_from_csv(file):
+        if row[0]:
+            yield row[0]
+
+def _int(value):
+    return int(value) if value else 0
+
+def _float(value):
+    return float(value) if value else 0.0
+
+def columns_from_csv(file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Parse a wiglecsv into column chunks of at most chunk_size rows.
+
+    Each chunk is a dict of column name to list (strings/datetimes) or typed
+    array (numbers), for vectorized work without a WigleDevice per row.
+    """
+    rows = iter_rows_from_csv(file)
+    while chunk := list(islice(rows, chunk_size)):
+        yield {
+            "mac": [row[0] for row in chunk],
+            "ssid": [row[1] for row in chunk],
+            "capabilities": [row[2] for row in chunk],
+            "first_seen": [datetime.fromisoformat(row[3]) for row in chunk],
+            "channel": array("i", (_int(row[4]) for row in chunk)),
+            "frequency": array("i", (_int(row[5]) for row in chunk)),
+            "rssi": array("i", (_int(row[6]) for row in chunk)),
+            "lat": array("d", (_float(row[7]) for row in chunk)),
+            "lon": array("d", (_float(row[8]) for row in chunk)),
+            "alt": array("d", (_float(row[9]) for row in chunk)),
+            "accuracy": array("d", (_float(row[10]) for row in chunk)),
+        }
+
+def devices_from_csv(file):
+    return list(iter_devices_from_csv(file))
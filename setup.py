@@ -27,6 +27,7 @@ setup(name="aya",
       download_url="https://github.com/DullnessOutfield/aya",
     packages=find_packages(include=['aya', 'aya.*']),
       install_requires=["kismet_rest", "requests >= 2.20"],
+      extras_require={"columnar": ["pyarrow"], "async": ["aiohttp"]},
       setup_requires=["kismet_rest", "requests >= 2.20"],
       classifiers=['Development Status :: 2 - Pre-Alpha',
           "Intended Audience :: Developers",
@@ -44,6 +45,8 @@ setup(name="aya",
             'aya-aplister-finder=aya.tools.APLister2:main',
             'aya-probegraph=aya.tools.probe_grapher:main',
             'aya-commondevices=aya.tools.WITWIJO:main',
+            'aya-rssicompare=aya.tools.rssi_compare:main',
+            'aya-crack=aya.tools.crack_server:main',
         ],
     },
     )
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""AlertEngine end to end against the mock Kismet server in aya/tools/WIP/mock_kismet.py."""
+
+import asyncio
+import threading
+import time
+import unittest
+from http.server import ThreadingHTTPServer
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+WIFI_MAC = "C4:4F:33:00:00:01"
+BTLE_MAC = "AA:BB:CC:00:00:02"
+
+
+@unittest.skipUnless(aiohttp, "needs the async extra (aiohttp)")
+class AlertEngineMockKismetTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        from aya.tools.WIP import mock_kismet
+
+        self.mock = mock_kismet
+        now = int(time.time())
+        # The BTLE device has no dot11 record, so the simplified fields come back as nulls
+        mock_kismet.devices.update({
+            "key-wifi": {
+                "kismet.device.base.key": "key-wifi",
+                "kismet.device.base.macaddr": WIFI_MAC,
+                "kismet.device.base.type": "Wi-Fi Client",
+                "kismet.device.base.first_time": now,
+                "kismet.device.base.last_time": now,
+                "kismet.device.base.signal": {"kismet.common.signal.last_signal": -50},
+                "dot11.device": {"dot11.device.probed_ssid_map": [{"dot11.probedssid.ssid": "home"}]},
+            },
+            "key-btle": {
+                "kismet.device.base.key": "key-btle",
+                "kismet.device.base.macaddr": BTLE_MAC,
+                "kismet.device.base.type": "BTLE",
+                "kismet.device.base.first_time": now,
+                "kismet.device.base.last_time": now,
+            },
+        })
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), mock_kismet.Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.mock.devices.clear()
+
+    async def test_run_alerts_on_wifi_and_btle_devices(self):
+        from aya.aiorest import AsyncConnection
+        from aya.alert import AlertEngine, SOIIndex
+
+        index = SOIIndex()
+        index.add_ssid("home", "home network")
+        index.add_mac(BTLE_MAC, "tracker")
+        alerts = []
+        engine = AlertEngine(index, [alerts.append])
+        async with AsyncConnection(address="127.0.0.1", port=self.server.server_address[1]) as connection:
+            task = asyncio.create_task(engine.run(connection, since=-60, interval=0.1))
+            deadline = time.monotonic() + 10
+            while len(alerts) < 2 and time.monotonic() < deadline and not task.done():
+                await asyncio.sleep(0.05)
+            self.assertFalse(task.done(), "the alert loop ended")
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+        found = {(alert.mac, alert.target, alert.matched_on) for alert in alerts}
+        self.assertEqual(found, {(WIFI_MAC, "home network", "probe"), (BTLE_MAC, "tracker", "mac")})
+        self.assertEqual(engine.stats["alerts"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+"""PMKID harvesting into a PMKIDStore."""
+
+import json
+import sqlite3
+import tempfile
+import unittest
+from contextlib import closing
+from pathlib import Path
+
+from aya.dot11 import DLT_IEEE802_11_RADIO
+from aya.lib import DEVICE_COLUMNS
+from aya.pmkid import PMKIDStore
+
+AP = bytes.fromhex("112233445566")
+CLIENT = bytes.fromhex("aabbccddeeff")
+DEVICE_PMKID = "ab" * 16
+PACKET_PMKID = "cd" * 16
+
+
+def eapol_message_1(pmkid: str) -> bytes:
+    """An EAPOL-Key message 1 from AP to CLIENT carrying a PMKID KDE, behind an empty radiotap header."""
+    radiotap = bytes([0, 0, 8, 0, 0, 0, 0, 0])
+    # Data frame from the DS: addr1 = receiver (client), addr2 = transmitter (AP), addr3 = BSSID
+    dot11 = bytes([0x08, 0x02, 0, 0]) + CLIENT + AP + AP + bytes(2)
+    llc = b"\xaa\xaa\x03\x00\x00\x00\x88\x8e"
+    key_data = b"\xdd\x14\x00\x0f\xac\x04" + bytes.fromhex(pmkid)
+    # Descriptor type, key info (pairwise | ack | version 2), key length, replay counter,
+    # nonce, IV, RSC, reserved and MIC, then the key data length and key data
+    key = bytes([2]) + (0x008A).to_bytes(2, "big") + (16).to_bytes(2, "big") + bytes(8 + 32 + 16 + 8 + 8 + 16)
+    key += len(key_data).to_bytes(2, "big") + key_data
+    eapol = bytes([2, 3]) + len(key).to_bytes(2, "big") + key
+    return radiotap + dot11 + llc + eapol
+
+
+def make_survey(kismet_file: Path) -> None:
+    """A kismetdb with one AP whose handshake list holds a PMKID, and an EAPOL packet with another."""
+    mac = ":".join(f"{i:02X}" for i in AP)
+    device = {
+        "kismet.device.base.macaddr": mac,
+        "kismet.device.base.commonname": "home",
+        "dot11.device": {
+            "dot11.device.wpa_handshake_list": [
+                {"dot11.eapol.rsn_pmkid": DEVICE_PMKID, "dot11.eapol.src_mac": mac,
+                 "dot11.eapol.dest_mac": ":".join(f"{i:02X}" for i in CLIENT)},
+            ],
+        },
+    }
+    with closing(sqlite3.connect(kismet_file)) as con, con:
+        con.execute(f"create table devices ({', '.join(DEVICE_COLUMNS)})")
+        con.execute("create table packets (dlt, packet)")
+        con.execute(
+            f"insert into devices values ({', '.join('?' * len(DEVICE_COLUMNS))})",
+            (0, 0, "key0", "IEEE802.11", mac, -50, 0, 0, 0, 0, 0, 0, 0, "Wi-Fi AP", json.dumps(device).encode()),
+        )
+        con.execute("insert into packets values (?, ?)", (DLT_IEEE802_11_RADIO, eapol_message_1(PACKET_PMKID)))
+
+
+class HarvestTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = Path(self.tmp.name)
+        self.survey = root / "a.kismet"
+        make_survey(self.survey)
+        self.store = PMKIDStore(root / "pmkids.sqlite")
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def test_devices_then_packets(self):
+        found = list(self.store.harvest([self.survey], workers=1))
+        self.assertEqual([i.pmkid for i in found], [DEVICE_PMKID])
+        self.assertTrue(self.store.is_current(self.survey))
+        self.assertFalse(self.store.is_current(self.survey, packets=True))
+
+        found = list(self.store.harvest([self.survey], packets=True, workers=1))
+        self.assertEqual([i.pmkid for i in found], [PACKET_PMKID])
+        self.assertEqual(found[0].ssid, "home")
+        self.assertTrue(self.store.is_current(self.survey, packets=True))
+        self.assertEqual(list(self.store.harvest([self.survey], packets=True, workers=1)), [])
+        # A packets harvest also covers a later devices-only run
+        self.assertEqual(list(self.store.harvest([self.survey], workers=1)), [])
+        self.assertEqual(len(self.store), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Incremental project ingest through Project.ingest and ProjectManifest."""
+
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from aya.lib import DEVICE_COLUMNS
+from aya.Project import Project, ProjectManifest
+
+START = 1700000000
+
+
+def add_devices(kismet_file: Path, count: int, offset: int = 0) -> None:
+    """Append count Wi-Fi clients to a minimal kismetdb devices table, creating it if needed."""
+    with sqlite3.connect(kismet_file) as con:
+        con.execute(f"create table if not exists devices ({', '.join(DEVICE_COLUMNS)})")
+        for i in range(offset, offset + count):
+            mac = f"C4:4F:33:00:00:{i:02X}"
+            device = {"kismet.device.base.macaddr": mac, "kismet.device.base.type": "Wi-Fi Client"}
+            con.execute(
+                f"insert into devices values ({', '.join('?' * len(DEVICE_COLUMNS))})",
+                (START, START + i, f"key{i}", "IEEE802.11", mac, -50, 0, 0, 0, 0, 0, 0, 0,
+                 "Wi-Fi Client", json.dumps(device).encode()),
+            )
+    con.close()
+
+
+class IngestTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.project_path = self.root / "project"
+        self.project_path.mkdir()
+        self.survey = self.project_path / "a.kismet"
+        self.manifest = ProjectManifest(self.root / "manifest.sqlite")
+        self.project = Project("project")
+
+    def tearDown(self):
+        self.manifest.close()
+        self.tmp.cleanup()
+
+    def ingest(self) -> dict:
+        changes = self.project.ingest(self.project_path, self.manifest, workers=1)
+        return {path.name: status for path, status in changes.items()}
+
+    def test_new_unchanged_appended(self):
+        add_devices(self.survey, 21)
+        self.assertEqual(self.ingest(), {"a.kismet": "new"})
+        self.assertEqual(len(self.project.surveys[0].devices), 21)
+        self.assertEqual(self.ingest(), {})
+
+        add_devices(self.survey, 1, offset=21)
+        # Make sure the change shows in the mtime even on coarse-grained filesystems
+        stat = self.survey.stat()
+        os.utime(self.survey, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        self.assertEqual(self.ingest(), {"a.kismet": "appended"})
+        self.assertEqual(len(self.project.surveys[0].devices), 22)
+        self.assertIsNone(self.manifest.get(self.survey).digest)
+        self.assertEqual(self.ingest(), {})
+
+    def test_removed_survey_is_dropped(self):
+        add_devices(self.survey, 3)
+        self.ingest()
+        self.survey.unlink()
+        self.assertEqual(self.ingest(), {"a.kismet": "removed"})
+        self.assertEqual(self.project.surveys, [])
+
+
+if __name__ == "__main__":
+    unittest.main()